@@ -0,0 +1,179 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases that were created by ``Base.metadata.create_all`` already have
+these tables; mark them with ``alembic stamp 0001`` instead of upgrading.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('phone_number', sa.String(), nullable=True),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'categories',
+        sa.Column('category_id', sa.Integer(), primary_key=True),
+        sa.Column('category_name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+    )
+    op.create_index('ix_categories_category_id', 'categories', ['category_id'])
+
+    op.create_table(
+        'products',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('price', sa.Numeric(), nullable=False),
+        sa.Column('discount_price', sa.Numeric(), nullable=True),
+        sa.Column('stock_qty', sa.Integer(), nullable=True),
+        sa.Column('brand', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(),
+                  sa.ForeignKey('categories.category_id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+    )
+    op.create_index('ix_products_id', 'products', ['id'])
+
+    op.create_table(
+        'addresses',
+        sa.Column('address_id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(),
+                  sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('street', sa.String(), nullable=True),
+        sa.Column('city', sa.String(), nullable=True),
+        sa.Column('state', sa.String(), nullable=True),
+        sa.Column('country', sa.String(), nullable=True),
+        sa.Column('postal_code', sa.String(), nullable=True),
+        sa.Column('is_default_shipping', sa.Boolean(), nullable=True),
+        sa.Column('is_default_billing', sa.Boolean(), nullable=True),
+    )
+    op.create_index('ix_addresses_address_id', 'addresses', ['address_id'])
+
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('total_amount', sa.Numeric(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id')),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id')),
+        sa.Column('quantity', sa.Integer()),
+        sa.Column('price', sa.Float()),
+    )
+
+    op.create_table(
+        'cart',
+        sa.Column('cart_id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(),
+                  sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+    )
+    op.create_index('ix_cart_cart_id', 'cart', ['cart_id'])
+
+    op.create_table(
+        'cart_items',
+        sa.Column('cart_item_id', sa.Integer(), primary_key=True),
+        sa.Column('cart_id', sa.Integer(),
+                  sa.ForeignKey('cart.cart_id'), nullable=False),
+        sa.Column('product_id', sa.Integer(),
+                  sa.ForeignKey('products.id'), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+    )
+    op.create_index('ix_cart_items_cart_item_id', 'cart_items', ['cart_item_id'])
+
+    op.create_table(
+        'payments',
+        sa.Column('payment_id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(),
+                  sa.ForeignKey('orders.id'), nullable=True),
+        sa.Column('payment_method', sa.String(), nullable=True),
+        sa.Column('amount', sa.Numeric(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('transaction_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+    )
+    op.create_index('ix_payments_payment_id', 'payments', ['payment_id'])
+
+    op.create_table(
+        'reviews',
+        sa.Column('review_id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(),
+                  sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('product_id', sa.Integer(),
+                  sa.ForeignKey('products.id'), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now()),
+    )
+    op.create_index('ix_reviews_review_id', 'reviews', ['review_id'])
+
+    op.create_table(
+        'shipping',
+        sa.Column('shipment_id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(),
+                  sa.ForeignKey('orders.id'), nullable=True),
+        sa.Column('courier_name', sa.String(), nullable=True),
+        sa.Column('tracking_number', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('estimated_delivery', sa.DateTime(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_shipping_shipment_id', 'shipping', ['shipment_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('shipping')
+    op.drop_table('reviews')
+    op.drop_table('payments')
+    op.drop_table('cart_items')
+    op.drop_table('cart')
+    op.drop_table('order_items')
+    op.drop_table('orders')
+    op.drop_table('addresses')
+    op.drop_table('products')
+    op.drop_table('categories')
+    op.drop_table('users')
@@ -0,0 +1,42 @@
+"""product catalog keyset indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+Each index ends in ``id`` so that ``ORDER BY <sort>, id`` plus the keyset
+predicate ``(<sort>, id) < (:value, :id)`` is served by one ordered index
+range scan, with or without a leading category/brand equality filter.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_products_created_at_id': ['created_at', 'id'],
+    'ix_products_price_id': ['price', 'id'],
+    'ix_products_category_created_at_id': ['category_id', 'created_at', 'id'],
+    'ix_products_category_price_id': ['category_id', 'price', 'id'],
+    'ix_products_brand_created_at_id': ['brand', 'created_at', 'id'],
+    'ix_products_brand_price_id': ['brand', 'price', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'products', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in INDEXES:
+        op.drop_index(name, table_name='products')
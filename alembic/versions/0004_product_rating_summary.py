@@ -0,0 +1,74 @@
+"""product rating summary columns
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:00:00.000000
+
+Adds the review count / sum / average / per-star histogram columns that
+crud.create_review maintains, backfills them from the existing reviews, and
+indexes them for the rating sorts and the paginated review listing.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_COLUMNS = ['review_count', 'rating_sum'] + [
+    f'rating_{rating}_count' for rating in range(1, 6)]
+
+INDEXES = {
+    'ix_products_rating_avg_id': ['rating_avg', 'id'],
+    'ix_products_review_count_id': ['review_count', 'id'],
+    'ix_products_category_rating_avg_id': ['category_id', 'rating_avg', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COUNT_COLUMNS:
+        op.add_column('products', sa.Column(
+            column, sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('products', sa.Column(
+        'rating_avg', sa.Numeric(3, 2), nullable=False, server_default='0'))
+
+    op.execute("""
+        UPDATE products SET
+            review_count = (SELECT count(*) FROM reviews r
+                            WHERE r.product_id = products.id),
+            rating_sum = (SELECT coalesce(sum(r.rating), 0) FROM reviews r
+                          WHERE r.product_id = products.id)
+    """)
+    for rating in range(1, 6):
+        op.execute(f"""
+            UPDATE products SET rating_{rating}_count = (
+                SELECT count(*) FROM reviews r
+                WHERE r.product_id = products.id AND r.rating = {rating})
+        """)
+    op.execute("""
+        UPDATE products SET rating_avg = round(
+            rating_sum * 1.0 / review_count, 2)
+        WHERE review_count > 0
+    """)
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'products', columns)
+    op.create_index('ix_reviews_product_id_review_id', 'reviews',
+                    ['product_id', 'review_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_product_id_review_id', table_name='reviews')
+    for name in INDEXES:
+        op.drop_index(name, table_name='products')
+    op.drop_column('products', 'rating_avg')
+    for column in reversed(COUNT_COLUMNS):
+        op.drop_column('products', column)
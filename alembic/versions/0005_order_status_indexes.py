@@ -0,0 +1,37 @@
+"""order status indexes for the shipping queue and admin export
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:30:00.000000
+
+ix_orders_ready_to_ship is partial (status = 'paid'), so it stays as small
+as the queue itself rather than growing with order history.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_orders_ready_to_ship', 'orders', ['id'],
+        postgresql_where=sa.text("status = 'paid'"),
+        sqlite_where=sa.text("status = 'paid'"))
+    op.create_index(
+        'ix_orders_status_created_at', 'orders', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_ready_to_ship', table_name='orders')
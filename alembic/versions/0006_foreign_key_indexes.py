@@ -0,0 +1,76 @@
+"""foreign key indexes, one cart per user, one cart line per product
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:00:00.000000
+
+Duplicate carts and cart lines are merged before the unique indexes are
+created: a user's carts fold into their oldest one, and repeated lines for
+a product are summed into the first.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# reviews.product_id is covered by ix_reviews_product_id_review_id (0004)
+INDEXES = {
+    'ix_addresses_user_id': ('addresses', ['user_id']),
+    'ix_orders_user_id': ('orders', ['user_id']),
+    'ix_order_items_order_id': ('order_items', ['order_id']),
+    'ix_order_items_product_id': ('order_items', ['product_id']),
+    'ix_cart_items_product_id': ('cart_items', ['product_id']),
+    'ix_payments_order_id': ('payments', ['order_id']),
+    'ix_reviews_user_id': ('reviews', ['user_id']),
+    'ix_shipping_order_id': ('shipping', ['order_id']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, (table, columns) in INDEXES.items():
+        op.create_index(name, table, columns)
+
+    op.execute("""
+        UPDATE cart_items SET cart_id = (
+            SELECT min(c2.cart_id) FROM cart c2
+            WHERE c2.user_id = (SELECT c.user_id FROM cart c
+                                WHERE c.cart_id = cart_items.cart_id))
+    """)
+    op.execute("""
+        DELETE FROM cart WHERE cart_id NOT IN (
+            SELECT min(cart_id) FROM cart GROUP BY user_id)
+    """)
+    op.create_index('ix_cart_user_id', 'cart', ['user_id'], unique=True)
+
+    op.execute("""
+        UPDATE cart_items SET quantity = (
+            SELECT sum(ci2.quantity) FROM cart_items ci2
+            WHERE ci2.cart_id = cart_items.cart_id
+              AND ci2.product_id = cart_items.product_id)
+        WHERE cart_item_id IN (
+            SELECT min(cart_item_id) FROM cart_items
+            GROUP BY cart_id, product_id HAVING count(*) > 1)
+    """)
+    op.execute("""
+        DELETE FROM cart_items WHERE cart_item_id NOT IN (
+            SELECT min(cart_item_id) FROM cart_items
+            GROUP BY cart_id, product_id)
+    """)
+    op.create_index('uq_cart_items_cart_id_product_id', 'cart_items',
+                    ['cart_id', 'product_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_cart_items_cart_id_product_id', table_name='cart_items')
+    op.drop_index('ix_cart_user_id', table_name='cart')
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,35 @@
+"""shipping.delivered_at is unknown until delivery
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 12:30:00.000000
+
+/shipping/create inserts shipments without delivered_at, which the NOT NULL
+constraint rejected.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('shipping') as batch_op:
+        batch_op.alter_column(
+            'delivered_at', existing_type=sa.DateTime(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('shipping') as batch_op:
+        batch_op.alter_column(
+            'delivered_at', existing_type=sa.DateTime(), nullable=False)
@@ -0,0 +1,39 @@
+"""rating sorts under a brand or category filter
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 15:00:00.000000
+
+The catalog benchmark at 50k and 200k products showed brand + rating,
+brand + most_reviewed and category + most_reviewed listings sorting every
+matching row, because only category + rating had a composite index.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_products_category_review_count_id': ['category_id', 'review_count', 'id'],
+    'ix_products_brand_rating_avg_id': ['brand', 'rating_avg', 'id'],
+    'ix_products_brand_review_count_id': ['brand', 'review_count', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'products', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in INDEXES:
+        op.drop_index(name, table_name='products')
@@ -0,0 +1,37 @@
+"""table write counters shared by all workers
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 16:00:00.000000
+
+Without Redis, the counters behind the catalog ETags and the category
+snapshot lived in each worker's memory, so a worker never saw another
+worker's writes. They now live in this table.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'table_versions',
+        sa.Column('name', sa.String(length=64), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('table_versions')
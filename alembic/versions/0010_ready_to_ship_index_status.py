@@ -0,0 +1,41 @@
+"""ready-to-ship index leads with status
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 17:00:00.000000
+
+On id alone the partial index lost to ix_orders_status_created_at, which
+answers status = 'paid' too but then sorts the queue in a temp b-tree.
+With (status, id) the queue is read in id order straight off the partial
+index.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_orders_ready_to_ship', table_name='orders')
+    op.create_index(
+        'ix_orders_ready_to_ship', 'orders', ['status', 'id'],
+        postgresql_where=sa.text("status = 'paid'"),
+        sqlite_where=sa.text("status = 'paid'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_ready_to_ship', table_name='orders')
+    op.create_index(
+        'ix_orders_ready_to_ship', 'orders', ['id'],
+        postgresql_where=sa.text("status = 'paid'"),
+        sqlite_where=sa.text("status = 'paid'"))
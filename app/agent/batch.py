@@ -0,0 +1,97 @@
+import asyncio
+import json
+import re
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from app.agent.parser import MIN_CONFIDENCE, parse_query
+from app.agent.tools import place_batch_order
+
+BATCH_EXTRACTION_PROMPT = PromptTemplate.from_template("""
+    Extract every product and its quantity from the user's shopping request(s).
+    Return ONLY a raw JSON array strictly. Do NOT include any markdown formatting (like ```json), explanations, or additional text.
+
+    Examples:
+    "3 pens, a notebook and 2 footballs" -> [{{"product_name": "Pen", "quantity": 3}}, {{"product_name": "Notebook", "quantity": 1}}, {{"product_name": "Football", "quantity": 2}}]
+
+    Request: "{query}"
+    
+    JSON:
+    """)
+
+_SEPARATORS = re.compile(r",|;|\n|\band\b|\bplus\b")
+
+
+def _parse_with_rules(queries, name_index):
+    """Items if every comma/"and" separated part parses confidently, else None."""
+    items = []
+    for query in queries:
+        for part in _SEPARATORS.split(query):
+            if not part.strip():
+                continue
+            name, quantity, confidence = parse_query(part, name_index)
+            if name is None or confidence < MIN_CONFIDENCE:
+                return None
+            items.append({"product_name": name, "quantity": quantity})
+    return items
+
+
+def _parse_items(raw_response: str):
+    cleaned = re.sub(r"```json|```", "", raw_response).strip()
+    start = cleaned.find("[")
+    end = cleaned.rfind("]") + 1
+    if start != -1 and end > start:
+        cleaned = cleaned[start:end]
+    try:
+        data = json.loads(cleaned)
+    except ValueError:
+        return []
+    items = []
+    for entry in data if isinstance(data, list) else []:
+        if not isinstance(entry, dict) or not entry.get("product_name"):
+            continue
+        try:
+            quantity = max(1, int(entry.get("quantity", 1)))
+        except (TypeError, ValueError):
+            quantity = 1
+        items.append({"product_name": str(entry["product_name"]), "quantity": quantity})
+    return items
+
+
+class BatchAgent:
+    """
+    Multi-item orders: every item in one query (or list of queries) is
+    extracted with at most one LLM call and placed as a single order.
+    """
+
+    def __init__(self, llm, limiter, name_index):
+        self.chain = BATCH_EXTRACTION_PROMPT | llm | StrOutputParser()
+        self.limiter = limiter
+        self.name_index = name_index
+
+    async def extract(self, queries):
+        await self.name_index.refresh_if_stale()
+        items = _parse_with_rules(queries, self.name_index)
+        if items:
+            return items
+        try:
+            raw_response = await self.limiter.run(
+                self.chain.ainvoke, {"query": "; ".join(queries)})
+        except asyncio.TimeoutError:
+            return []
+        return _parse_items(raw_response)
+
+    async def order(self, queries, user, db):
+        items = await self.extract(queries)
+        if not items:
+            return {"message": "❌ I could not find any products in that request."}
+        if not user:
+            return {"message": "⚠️ You must be logged in to place an order."}
+
+        result = await place_batch_order(db, user, items, self.name_index)
+        if "error" in result:
+            return {"message": f"❌ Could not place order: {result['error']}"}
+        return {
+            "message": f"✅ Order placed successfully! Order ID: {result['order_id']}",
+            "order_id": result["order_id"],
+            "lines": result["lines"],
+        }
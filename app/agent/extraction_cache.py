@@ -0,0 +1,121 @@
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from app.search import trigrams
+
+NUMBER_WORDS = {
+    "a": "1", "an": "1", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "ten": "10",
+}
+
+_WORD = re.compile(r"[a-z]+|\d+")
+
+
+def normalize(query: str) -> str:
+    """Lowercase words with number words spelled as digits."""
+    words = _WORD.findall(query.lower())
+    return " ".join(NUMBER_WORDS.get(word, word) for word in words)
+
+
+def _numbers(normalized: str):
+    return tuple(word for word in normalized.split() if word.isdigit())
+
+
+def _similarity(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _names_product(words: set, result: dict) -> bool:
+    """Whether every word of the result's product name is in the query."""
+    name = normalize(str(result.get("product_name", "")))
+    return bool(name) and all(
+        word in words or word + "s" in words or word + "es" in words
+        for word in name.split())
+
+
+class ExtractionCache:
+    """
+    Size-bounded LRU of extract_entities results ({product_name, quantity}).
+
+    Lookups try the normalized query exactly, then, if fuzzy is enabled
+    (off by default), the most similar cached query by character-trigram
+    overlap. A near-duplicate must contain exactly the same numbers, so
+    "buy 2 footballs" can never answer "buy 3 footballs", and must mention
+    every word of the cached product name, so "puma running shoes" never
+    gets the answer cached for "nike running shoes".
+    """
+
+    def __init__(self, maxsize: int = 5000, threshold: float = 0.8, fuzzy: bool = False):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.fuzzy = fuzzy
+        self._entries = OrderedDict()       # normalized -> (grams, result)
+        self._by_numbers = defaultdict(set)  # number tuple -> normalized keys
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            maxsize=int(os.getenv("AGENT_EXTRACTION_CACHE_SIZE", "5000")),
+            threshold=float(os.getenv("AGENT_EXTRACTION_CACHE_THRESHOLD", "0.8")),
+            fuzzy=os.getenv("AGENT_EXTRACTION_CACHE_FUZZY", "false").lower() in ("1", "true", "yes"),
+        )
+
+    def get(self, query: str):
+        key = normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return dict(entry[1])
+            if self.fuzzy:
+                grams = trigrams(key)
+                words = set(key.split())
+                best, best_score = None, self.threshold
+                for candidate in self._by_numbers.get(_numbers(key), ()):
+                    candidate_grams, result = self._entries[candidate]
+                    score = _similarity(grams, candidate_grams)
+                    if score >= best_score and _names_product(words, result):
+                        best, best_score = candidate, score
+                if best is not None:
+                    self._entries.move_to_end(best)
+                    self.fuzzy_hits += 1
+                    return dict(self._entries[best][1])
+            self.misses += 1
+            return None
+
+    def put(self, query: str, result: dict):
+        key = normalize(query)
+        with self._lock:
+            self._entries[key] = (trigrams(key), dict(result))
+            self._entries.move_to_end(key)
+            self._by_numbers[_numbers(key)].add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                bucket = self._by_numbers[_numbers(old_key)]
+                bucket.discard(old_key)
+                if not bucket:
+                    del self._by_numbers[_numbers(old_key)]
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.exact_hits + self.fuzzy_hits + self.misses
+        hits = self.exact_hits + self.fuzzy_hits
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            # every hit is an LLM round trip that was not made
+            "llm_calls_saved": hits,
+        }
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import re
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+# Offline stand-in for the Groq model, for load testing the agent without
+# network calls or API quota. Set AGENT_FAKE_LLM=1 to use it.
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+
+def _extract_item(query: str) -> dict:
+    words = re.findall(r"[a-zA-Z]+|\d+", query.lower())
+
+    quantity = 1
+    for word in words:
+        if word.isdigit():
+            quantity = int(word)
+            break
+        if word in NUMBER_WORDS:
+            quantity = NUMBER_WORDS[word]
+            break
+
+    name = words[-1] if words else query
+    if name.endswith("s") and len(name) > 3:
+        name = name[:-1]
+    return {"product_name": name.capitalize(), "quantity": quantity}
+
+
+def _extract(prompt_text: str) -> str:
+    match = re.search(r'Request: "(.*)"', prompt_text)
+    query = match.group(1) if match else prompt_text
+    if "JSON array" in prompt_text:
+        # batch prompt: one item per comma / "and" / ";" separated part
+        parts = re.split(r",|;|\band\b", query)
+        return json.dumps([_extract_item(p) for p in parts if p.strip()])
+    return json.dumps(_extract_item(query))
+
+
+def build_fake_llm(latency: float = 0.3):
+    """A runnable answering extraction prompts after `latency` seconds."""
+
+    def invoke(prompt_value):
+        time.sleep(latency)
+        return _extract(prompt_value.to_string())
+
+    async def ainvoke(prompt_value):
+        await asyncio.sleep(latency)
+        return _extract(prompt_value.to_string())
+
+    return RunnableLambda(invoke, afunc=ainvoke)
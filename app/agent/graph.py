@@ -1,14 +1,29 @@
 from langgraph.graph import StateGraph, END
 from app.agent.state import AgentState
-from app.agent.nodes import extract_entities, stock_and_order
+from app.agent.limits import limiter_from_env
+from app.agent.nodes import build_extraction_chain, extract_entities, stock_and_order
+from app.agent.parser import ProductNameIndex, parse_with_rules, route_after_parse
 
-def build_agent(llm):
+def build_agent(llm, limiter=None, cache=None, name_index=None):
+    limiter = limiter or limiter_from_env()
+    name_index = name_index or ProductNameIndex()
+    chain = build_extraction_chain(llm)
     graph = StateGraph(AgentState)
 
-    graph.add_node("extract", lambda s: extract_entities(s, llm))
+    async def parse(state):
+        return await parse_with_rules(state, name_index)
+
+    async def extract(state):
+        return await extract_entities(state, chain, limiter, cache)
+
+    graph.add_node("parse", parse)
+    graph.add_node("extract", extract)
     graph.add_node("process", stock_and_order)
 
-    graph.set_entry_point("extract")
+    # simple requests skip the LLM when the rule parser is confident
+    graph.set_entry_point("parse")
+    graph.add_conditional_edges(
+        "parse", route_after_parse, {"process": "process", "extract": "extract"})
     graph.add_edge("extract", "process")
     graph.add_edge("process", END)
 
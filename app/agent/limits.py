@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursting to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LLMLimiter:
+    """
+    Caps concurrent LLM calls (semaphore), optionally their rate (token
+    bucket), and gives each call a timeout, so a slow provider queues agent
+    requests here instead of exhausting workers.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            rate_per_sec: float = 0,
+            burst: int = None,
+            timeout: float = 15):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = None
+        if rate_per_sec > 0:
+            self._bucket = TokenBucket(
+                rate_per_sec, burst or max(1, int(rate_per_sec)))
+        self.timeout = timeout
+
+    async def run(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) under the limits; raises asyncio.TimeoutError."""
+        if self._bucket is not None:
+            await self._bucket.acquire()
+        async with self._semaphore:
+            return await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+
+
+def limiter_from_env() -> LLMLimiter:
+    return LLMLimiter(
+        max_concurrency=int(os.getenv("AGENT_LLM_MAX_CONCURRENCY", "8")),
+        rate_per_sec=float(os.getenv("AGENT_LLM_RATE_PER_SEC", "0")),
+        timeout=float(os.getenv("AGENT_LLM_TIMEOUT", "15")),
+    )
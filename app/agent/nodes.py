@@ -1,9 +1,11 @@
+import asyncio
+import json
+import re
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.output_parsers import StrOutputParser
 from app.agent.tools import get_product_by_name, place_order
 
-def extract_entities(state, llm):
-    prompt = PromptTemplate.from_template("""
+EXTRACTION_PROMPT = PromptTemplate.from_template("""
     Extract the core product name and quantity from the user's request.
     Return ONLY a raw JSON strictly. Do NOT include any markdown formatting (like ```json), explanations, or additional text.
 
@@ -16,35 +18,48 @@ def extract_entities(state, llm):
     JSON:
     """)
 
-    from langchain_core.output_parsers import StrOutputParser
-    import json
-    import re
 
-    chain = prompt | llm | StrOutputParser()
-    raw_response = chain.invoke({"query": state["user_query"]})
-    
-    # Clean response (remove markdown code blocks if any)
-    cleaned = re.sub(r"```json|```", "", raw_response).strip()
-    
-    try:
-        # try finding the first { and last }
-        start = cleaned.find("{")
-        end = cleaned.rfind("}") + 1
-        if start != -1 and end != -1:
-             cleaned = cleaned[start:end]
-        
-        data = json.loads(cleaned)
-    except Exception:
-        # Fallback default if parsing fails completely
-        data = {"product_name": state["user_query"], "quantity": 1}
+def build_extraction_chain(llm):
+    return EXTRACTION_PROMPT | llm | StrOutputParser()
+
+
+async def extract_entities(state, chain, limiter, cache=None):
+    query = state["user_query"]
+    data = cache.get(query) if cache is not None else None
+
+    if data is None:
+        try:
+            raw_response = await limiter.run(chain.ainvoke, {"query": query})
+        except asyncio.TimeoutError:
+            # treated like an unparseable reply below
+            raw_response = ""
+
+        # Clean response (remove markdown code blocks if any)
+        cleaned = re.sub(r"```json|```", "", raw_response).strip()
+
+        try:
+            # try finding the first { and last }
+            start = cleaned.find("{")
+            end = cleaned.rfind("}") + 1
+            if start != -1 and end != -1:
+                 cleaned = cleaned[start:end]
+
+            data = json.loads(cleaned)
+            if cache is not None:
+                cache.put(query, data)
+        except Exception:
+            # Fallback default if parsing fails completely
+            data = {"product_name": query, "quantity": 1}
 
     state["product_name"] = data.get("product_name", "Unknown")
     state["requested_qty"] = data.get("quantity", 1)
+    state["parsed_by"] = "llm"
     return state
 
 
-def stock_and_order(state):
-    product = get_product_by_name(state["product_name"])
+async def stock_and_order(state):
+    db = state["db"]
+    product = await get_product_by_name(db, state["product_name"])
 
     if not product:
         state["response"] = "❌ This product is not available on this platform."
@@ -54,6 +69,8 @@ def stock_and_order(state):
         state["response"] = "❌ This product is out of stock."
         return state
 
+    # read before ordering: the order commits and expires the product
+    product_id, available = product.id, product.stock_qty
     requested = state["requested_qty"]
 
     if requested > product.stock_qty:
@@ -70,15 +87,15 @@ def stock_and_order(state):
         state["response"] = "⚠️ You must be logged in to place an order."
         return state
 
-    result = place_order(user, product.id, final_qty)
+    result = await place_order(db, user, product_id, final_qty)
     
     if "error" in result:
          state["response"] = f"❌ Could not place order: {result['error']}"
     else:
          state["response"] = f"✅ Order placed successfully! Order ID: {result.get('order_id')}"
 
-    state["product_id"] = product.id
-    state["available_stock"] = product.stock_qty
+    state["product_id"] = product_id
+    state["available_stock"] = available
     state["final_qty"] = final_qty
 
     return state
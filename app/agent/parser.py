@@ -0,0 +1,148 @@
+import asyncio
+import os
+import re
+import threading
+import time
+
+from app.database import SessionLocal
+from app.models import Products
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+# words that carry no product information in an order request
+STOPWORDS = {
+    "buy", "get", "order", "purchase", "want", "need", "add", "me", "i", "id",
+    "would", "like", "to", "please", "some", "of", "the", "for", "my", "can",
+    "you", "could", "pcs", "pieces", "piece", "units", "unit", "x",
+}
+
+# letters and digits stay together ("ps5"); "2x" splits off its count
+_WORD = re.compile(r"\d+(?=x\b)|[a-z0-9]+")
+
+
+def singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def name_tokens(text: str):
+    return frozenset(singular(w) for w in _WORD.findall((text or "").lower()))
+
+
+class ProductNameIndex:
+    """
+    Product names by singularized token, reloaded from the database at most
+    every `ttl` seconds. Small enough to keep in memory for the fast path.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._names = {}           # token set -> product name
+        self._by_token = {}        # token -> token sets containing it
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        db = SessionLocal()
+        try:
+            rows = db.query(Products.name).filter(
+                Products.is_active.isnot(False)).all()
+        finally:
+            db.close()
+        self.load_names(row.name for row in rows)
+
+    def load_names(self, product_names):
+        names, by_token = {}, {}
+        for product_name in product_names:
+            tokens = name_tokens(product_name)
+            if not tokens:
+                continue
+            names.setdefault(tokens, product_name)
+            for token in tokens:
+                by_token.setdefault(token, set()).add(tokens)
+        with self._lock:
+            self._names, self._by_token = names, by_token
+            self._loaded_at = time.monotonic()
+
+    async def refresh_if_stale(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            await asyncio.to_thread(self._load)
+
+    def match(self, tokens: frozenset):
+        """(product name, confidence) for the query tokens, or (None, 0.0)."""
+        with self._lock:
+            if tokens in self._names:
+                return self._names[tokens], 1.0
+            candidates = set()
+            for token in tokens:
+                candidates |= self._by_token.get(token, set())
+            # every query word must be part of the product name
+            covering = [c for c in candidates if tokens <= c]
+            if len(covering) == 1:
+                name_set = covering[0]
+                return self._names[name_set], len(tokens) / len(name_set)
+        return None, 0.0
+
+
+MIN_CONFIDENCE = float(os.getenv("AGENT_PARSER_MIN_CONFIDENCE", "0.5"))
+
+
+def parse_query(query: str, index: ProductNameIndex):
+    """
+    (product name, quantity, confidence) from a simple order request.
+
+    Only a number before the product words is a quantity; later digits are
+    part of the name ("iphone 15"). Anything that doesn't fit that shape
+    (two counts, a count word after the product, a count that is also in
+    the matched name) gets a confidence below MIN_CONFIDENCE so the LLM
+    decides.
+    """
+    quantity = None
+    quantity_word = None
+    ambiguous = False
+    rest = []
+    for word in _WORD.findall(query.lower()):
+        is_number = word.isdigit() or word in NUMBER_WORDS
+        if is_number and not rest:
+            if quantity is not None:
+                ambiguous = True
+            quantity = int(word) if word.isdigit() else NUMBER_WORDS[word]
+            quantity_word = word
+        elif word in NUMBER_WORDS:
+            # "laptop and a mouse", "pens two"
+            ambiguous = True
+        elif word not in STOPWORDS:
+            rest.append(singular(word))
+    if not rest:
+        return None, quantity or 1, 0.0
+    name, confidence = index.match(frozenset(rest))
+    if name is not None and quantity_word is not None \
+            and quantity_word.isdigit() and quantity_word in name_tokens(name):
+        # "buy 15 iphone" with an "iPhone 15" in the catalog
+        ambiguous = True
+    if ambiguous:
+        confidence = min(confidence, MIN_CONFIDENCE / 2)
+    return name, quantity or 1, confidence
+
+
+async def parse_with_rules(state, index: ProductNameIndex):
+    await index.refresh_if_stale()
+    name, quantity, confidence = parse_query(state["user_query"], index)
+    state["parse_confidence"] = confidence
+    if name is not None and confidence >= MIN_CONFIDENCE:
+        state["product_name"] = name
+        state["requested_qty"] = quantity
+        state["parsed_by"] = "rules"
+    return state
+
+
+def route_after_parse(state):
+    return "process" if state.get("parsed_by") == "rules" else "extract"
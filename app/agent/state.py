@@ -3,9 +3,13 @@ from typing import TypedDict, Optional, Any
 class AgentState(TypedDict):
     user_query: str
     user: Any
+    # request-scoped sqlalchemy Session shared by every tool call
+    db: Any
 
     product_name: Optional[str]
     requested_qty: Optional[int]
+    parse_confidence: Optional[float]
+    parsed_by: Optional[str]
 
     product_id: Optional[int]
     available_stock: Optional[int]
@@ -1,33 +1,31 @@
-from app.database import SessionLocal
+import asyncio
 from app import crud
+from app.agent.parser import name_tokens
 import requests
 
 ORDER_API = "http://localhost:8000/orders/order-product"
 
-def get_product_by_name(name: str):
-    db = SessionLocal()
-    try:
-        return crud.get_product_by_name(db, name)
-    finally:
-        db.close()
+# Tools run on the request's own Session (carried in AgentState["db"]), so
+# the product lookup and the order share one transaction and the user object
+# stays bound to the session that loaded it. The session is synchronous, so
+# each call runs in a worker thread; the agent never uses it concurrently.
+
+async def get_product_by_name(db, name: str):
+    return await asyncio.to_thread(crud.get_product_by_name, db, name)
+
+
+async def place_order(db, user, product_id: int, quantity: int):
+    return await asyncio.to_thread(_place_order, db, user, product_id, quantity)
+
 
+async def place_batch_order(db, user, items, name_index):
+    return await asyncio.to_thread(_place_batch_order, db, user, items, name_index)
 
-def place_order(user, product_id: int, quantity: int):
-    db = SessionLocal()
+
+def _place_order(db, user, product_id: int, quantity: int):
     try:
-        # Resolve shipping address (simplistic logic: use default or first available)
-        shipping_id = None
-        # Accessing user.addresses might require the user object to be bound to a session 
-        # or have eager loaded addresses. If user session is closed, this might fail.
-        # But commonly in FastAPI with Depends, the session is open during request processing.
-        if user.addresses:
-            for addr in user.addresses:
-                if addr.is_default_shipping:
-                    shipping_id = addr.address_id
-                    break
-            if not shipping_id:
-                shipping_id = user.addresses[0].address_id
-        
+        # one indexed lookup instead of loading every address of the user
+        shipping_id = crud.get_default_shipping_address_id(db, user.id)
         if not shipping_id:
             return {"error": "No shipping address found. Please add an address to your profile."}
 
@@ -41,5 +39,66 @@ def place_order(user, product_id: int, quantity: int):
         return {"order_id": order.id, "message": "Order placed successfully!"}
     except Exception as e:
         return {"error": f"Failed to place order: {str(e)}"}
-    finally:
-        db.close()
+
+
+def _resolve_products(db, names, name_index):
+    """
+    {requested name: product or None}. Names are canonicalized through the
+    in-memory name index so that one exact-match query resolves most of
+    them; only the leftovers go through full-text search.
+    """
+    canonical = {}
+    for name in names:
+        match, _ = name_index.match(name_tokens(name))
+        canonical[name] = match or name
+    found = crud.get_products_by_names(db, canonical.values())
+    resolved = {}
+    for name, canonical_name in canonical.items():
+        product = found.get(canonical_name.lower())
+        resolved[name] = product or crud.get_product_by_name(db, name)
+    return resolved
+
+
+def _place_batch_order(db, user, items, name_index):
+    """
+    One order for [{"product_name", "quantity"}, ...]. Quantities are cut
+    down to available stock and unavailable products are skipped, as the
+    single-item agent does.
+    """
+    try:
+        shipping_id = crud.get_default_shipping_address_id(db, user.id)
+        if not shipping_id:
+            return {"error": "No shipping address found. Please add an address to your profile."}
+
+        resolved = {
+            name: (product.id, product.name) if product else None
+            for name, product in _resolve_products(
+                db, [item["product_name"] for item in items], name_index).items()
+        }
+        quantities = {}
+        for item in items:
+            match = resolved[item["product_name"]]
+            if match is not None:
+                quantities[match[0]] = quantities.get(match[0], 0) + item["quantity"]
+        if not quantities:
+            return {"error": "None of these products are available on this platform."}
+
+        order, ordered = crud.create_order_for_items(
+            db,
+            user,
+            quantities,
+            shipping_address_id=shipping_id,
+            allow_partial=True)
+
+        lines = []
+        for item in items:
+            match = resolved[item["product_name"]]
+            lines.append({
+                "requested": item["product_name"],
+                "product": match[1] if match else None,
+                "quantity": item["quantity"],
+                "ordered": ordered.get(match[0], 0) if match else 0,
+            })
+        return {"order_id": order.id, "lines": lines}
+    except Exception as e:
+        return {"error": f"Failed to place order: {str(e)}"}
@@ -0,0 +1,113 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app import crud, models, schemas
+
+# Async counterparts of the read-heavy functions in crud.py. Relationships
+# cannot be lazy loaded on an AsyncSession, so anything a response model
+# serializes has to be eager loaded here.
+
+# -------------------- USERS --------------------
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(
+        select(models.Users).where(models.Users.email == email))
+    return result.scalars().first()
+
+
+async def create_user(
+        db: AsyncSession,
+        user: schemas.UserCreate,
+        hashed_password: str):
+    db_user = models.Users(
+        first_name=user.first_name,
+        last_name=user.last_name,
+        email=user.email,
+        password_hash=hashed_password,
+        phone_number=user.phone_number,
+        role="user"
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+# -------------------- CATEGORIES --------------------
+
+
+async def get_category_by_id(db: AsyncSession, category_id: int):
+    result = await db.execute(
+        select(models.Categories).where(
+            models.Categories.category_id == category_id))
+    return result.scalars().first()
+
+# -------------------- PRODUCTS --------------------
+
+
+async def get_product(db: AsyncSession, product_id: int):
+    snapshot = crud.product_cache.get(product_id)
+    if snapshot is not None:
+        product, category = crud.cached_product_objects(snapshot)
+        merged = await db.merge(product, load=False)
+        # see crud._merge_cached; a lazy load here would fail on AsyncSession
+        set_committed_value(
+            merged, "category",
+            await db.merge(category, load=False) if category is not None else None)
+        return merged
+    result = await db.execute(
+        select(models.Products)
+        .options(selectinload(models.Products.category))
+        .where(models.Products.id == product_id))
+    product = result.scalars().first()
+    if product:
+        crud.cache_product(product)
+    return product
+
+# -------------------- ORDERS --------------------
+
+
+async def get_orders_for_user(
+        db: AsyncSession,
+        user: models.Users,
+        as_rows: bool = False):
+    if as_rows:
+        result = await db.execute(
+            select(*crud.ORDER_ROW_COLUMNS).where(
+                models.Orders.user_id == user.id))
+        return result.all()
+    result = await db.execute(
+        select(models.Orders).where(models.Orders.user_id == user.id))
+    return result.scalars().all()
+
+# -------------------- REVIEWS --------------------
+
+
+async def get_reviews_for_product(
+        db: AsyncSession,
+        product_id: int,
+        as_rows: bool = False,
+        before: int = None,
+        limit: int = 20):
+    """
+    Newest reviews first, keyset-paginated: pass the last review_id of a
+    page as before to get the next one.
+    """
+    if as_rows:
+        query = select(
+            models.Reviews.review_id,
+            models.Users.first_name.label("name"),
+            models.Reviews.rating,
+            models.Reviews.comment,
+            models.Reviews.product_id)
+    else:
+        query = select(models.Reviews, models.Users.first_name)
+    query = query.join(
+        models.Users, models.Reviews.user_id == models.Users.id).where(
+        models.Reviews.product_id == product_id)
+    if before is not None:
+        query = query.where(models.Reviews.review_id < before)
+    result = await db.execute(
+        query.order_by(models.Reviews.review_id.desc()).limit(limit))
+    return result.all()
@@ -0,0 +1,258 @@
+import csv
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+from pydantic import ValidationError
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import crud, fast_json, schemas, search
+from app.category_snapshot import category_snapshot
+from app.crud import product_cache
+from app.http_cache import versions
+from app.models import Orders, Products
+
+IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_EXPORT_CHUNK_SIZE", "1000"))
+# the report keeps the first errors only, so a bad 1M-row file stays small
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_COLUMNS = (
+    "id", "name", "description", "price", "discount_price",
+    "stock_qty", "brand", "category_id", "is_active",
+)
+FORMATS = ("csv", "jsonl")
+
+
+def format_from_filename(filename: str):
+    for fmt in FORMATS:
+        if filename and filename.lower().endswith("." + fmt):
+            return fmt
+    return None
+
+
+def read_rows(stream, fmt: str):
+    """
+    Yields (row_number, data, error) for each record of a text stream, one
+    record at a time. Empty CSV cells become None.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, {k: (v if v != "" else None) for k, v in row.items()}, None
+        return
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, "expected a JSON object"
+            continue
+        yield number, data, None
+
+
+def _validated(data: dict) -> dict:
+    """ProductCreate-validated column values, plus id when the row has one."""
+    product_id = data.pop("id", None)
+    values = schemas.ProductCreate(**data).model_dump()
+    values["discount_price"] = values["discount_price"] or 0
+    values["stock_qty"] = values["stock_qty"] or 0
+    if values["is_active"] is None:
+        values["is_active"] = True
+    if product_id is not None:
+        values["id"] = int(product_id)
+    return values
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors())
+
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(Products)
+    if dialect == "sqlite":
+        return sqlite.insert(Products)
+    raise ValueError(f"Bulk import is not supported on {dialect}")
+
+
+def _write(db: Session, rows):
+    """
+    Inserts rows without an id and upserts rows with one (ON CONFLICT on the
+    primary key). Returns the ids in row order. Does not commit.
+    """
+    ids = [None] * len(rows)
+    for has_id in (False, True):
+        positions = [i for i, row in enumerate(rows) if ("id" in row) == has_id]
+        if not positions:
+            continue
+        stmt = _insert(db)
+        if has_id:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Products.id],
+                set_={
+                    **{col: stmt.excluded[col]
+                       for col in rows[positions[0]] if col != "id"},
+                    "updated_at": func.now(),
+                })
+        result = db.execute(
+            stmt.returning(Products.id, sort_by_parameter_order=True),
+            [rows[i] for i in positions])
+        for i, product_id in zip(positions, result.scalars()):
+            ids[i] = product_id
+    return ids
+
+
+def _record_error(report, number, message):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": number, "error": message})
+
+
+def _flush(db: Session, batch, report):
+    rows = [values for _, values in batch]
+    try:
+        ids = _write(db, rows)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        # something in the batch broke a constraint; redo it row by row so
+        # only the offending rows are reported
+        ids = []
+        kept = []
+        for number, values in batch:
+            try:
+                ids += _write(db, [values])
+                db.commit()
+                kept.append(values)
+            except SQLAlchemyError as e:
+                db.rollback()
+                _record_error(report, number, str(getattr(e, "orig", e)))
+        rows = kept
+
+    for product_id, values in zip(ids, rows):
+        if "id" in values:
+            product_cache.delete(product_id)
+        search.product_index.upsert(SimpleNamespace(id=product_id, **{
+            key: values[key] for key in ("name", "description", "brand")}))
+    report["imported"] += len(ids)
+
+
+def import_products(db: Session, rows, batch_size: int = IMPORT_BATCH_SIZE):
+    """
+    Validates and writes rows from read_rows in batches of batch_size.
+    Good rows are committed even when others fail; the report lists the
+    failures by row number.
+    """
+    report = {"processed": 0, "imported": 0, "failed": 0, "errors": []}
+    batch = []
+    explicit_ids = False
+    for number, data, error in rows:
+        report["processed"] += 1
+        if error is None:
+            try:
+                batch.append((number, _validated(data)))
+            except ValidationError as e:
+                error = _describe(e)
+            except (TypeError, ValueError) as e:
+                error = str(e)
+        if error is not None:
+            _record_error(report, number, error)
+            continue
+        explicit_ids = explicit_ids or "id" in batch[-1][1]
+        if len(batch) >= batch_size:
+            _flush(db, batch, report)
+            batch = []
+    if batch:
+        _flush(db, batch, report)
+
+    if explicit_ids and db.get_bind().dialect.name == "postgresql":
+        # explicit ids don't advance the serial; keep new inserts clear of them
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('products', 'id'), "
+            "(SELECT max(id) FROM products))"))
+        db.commit()
+    if report["imported"]:
+        versions.bump("products")
+        category_snapshot.invalidate()
+    return report
+
+
+def stream_rows(session_factory, statement, fmt: str,
+                chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Yields the rows of a select as CSV or JSONL, chunk_size rows per chunk,
+    through a server-side cursor. Opens its own session since it outlives
+    the request's dependencies when streamed.
+    """
+    with session_factory() as db:
+        result = db.execute(
+            statement, execution_options={"yield_per": chunk_size})
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(result.keys())
+            for partition in result.partitions():
+                writer.writerows(partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield b"".join(
+                    fast_json.dumps(row._asdict()) + b"\n" for row in partition)
+
+
+def export_products(session_factory, fmt: str):
+    columns = [getattr(Products, name) for name in EXPORT_COLUMNS]
+    return stream_rows(
+        session_factory, select(*columns).order_by(Products.id), fmt)
+
+
+def export_orders(session_factory, fmt: str, status: str = None,
+                  created_from=None, created_to=None):
+    """Orders (without items) by id, optionally filtered; see stream_rows."""
+    statement = select(*crud.ORDER_ROW_COLUMNS).order_by(Orders.id)
+    if status is not None:
+        statement = statement.where(Orders.status == status)
+    if created_from is not None:
+        statement = statement.where(Orders.created_at >= created_from)
+    if created_to is not None:
+        statement = statement.where(Orders.created_at < created_to)
+    return stream_rows(session_factory, statement, fmt)
+
+
+if __name__ == "__main__":
+    # python -m app.bulk import products.csv | python -m app.bulk export products.jsonl
+    from app.database import SessionLocal
+
+    if len(sys.argv) != 3 or sys.argv[1] not in ("import", "export") \
+            or format_from_filename(sys.argv[2]) is None:
+        sys.exit("usage: python -m app.bulk import|export FILE.csv|FILE.jsonl")
+    command, path = sys.argv[1], sys.argv[2]
+    fmt = format_from_filename(path)
+    if command == "import":
+        with open(path, newline="", encoding="utf-8") as stream, \
+                SessionLocal() as db:
+            report = import_products(db, read_rows(stream, fmt))
+        print(json.dumps(report, indent=2))
+    else:
+        mode = "w" if fmt == "csv" else "wb"
+        with open(path, mode, **({"newline": ""} if fmt == "csv" else {})) as out:
+            for chunk in export_products(SessionLocal, fmt):
+                out.write(chunk)
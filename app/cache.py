@@ -0,0 +1,169 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class CacheBackend:
+    """
+    Key/value cache interface. get() returns None on a miss, so None itself
+    cannot be cached. ttl is in seconds; None means the backend default.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl: float = None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend for any Redis-compatible client (redis-py API: get/set/delete/
+    scan_iter). Eviction happens server side, so only hits/misses are counted.
+    """
+
+    def __init__(self, client, prefix: str, ttl: float = 300):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self.client.set(
+            self._key(key), pickle.dumps(value), px=int(ttl * 1000))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+def build_cache(name: str, maxsize: int, ttl: float) -> CacheBackend:
+    """
+    In-process LRU by default; a shared Redis cache when CACHE_REDIS_URL is
+    set (requires the optional `redis` package).
+    """
+    redis_url = os.getenv("CACHE_REDIS_URL")
+    if not redis_url:
+        return LRUCache(maxsize=maxsize, ttl=ttl)
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(
+            "CACHE_REDIS_URL is set but the 'redis' package is not installed")
+    return RedisCache(redis.Redis.from_url(redis_url), prefix=f"{name}:", ttl=ttl)
+
+
+def row_snapshot(obj, exclude=()):
+    """Plain {column: value} dict of an ORM row, safe to cache."""
+    return {
+        c.key: getattr(obj, c.key)
+        for c in obj.__table__.columns
+        if c.key not in exclude
+    }
+
+
+def detached_from_snapshot(model, snapshot):
+    """
+    A detached instance of model built from row_snapshot() output. Attach it
+    with session.merge(obj, load=False) to use it like a loaded row without
+    a SELECT; columns missing from the snapshot load on first access.
+    """
+    obj = model(**snapshot)
+    make_transient_to_detached(obj)
+    return obj
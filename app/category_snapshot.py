@@ -0,0 +1,105 @@
+import threading
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.http_cache import versions
+
+# bumped by every write that changes a category or the active products in it
+VERSION_KEY = "category_snapshot"
+
+
+def _counter(version: str) -> int:
+    # versions are plain counters, but older "<epoch>.<n>" strings still parse
+    return int(version.rsplit(".", 1)[-1])
+
+
+class CategorySnapshot:
+    """
+    Categories with their active-product count and price range, held in
+    memory and served without a query.
+
+    The process that makes a write refreshes just the affected categories
+    (one grouped query) and bumps the version. The version lives in Redis
+    or the table_versions table on the primary, so every worker sees the
+    bump and rebuilds on its next read.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.version = None
+        self._lock = threading.Lock()
+
+    def _aggregate(self, db: Session, category_ids=None):
+        Categories, Products = models.Categories, models.Products
+        query = db.query(
+            Categories.category_id,
+            Categories.category_name,
+            Categories.description,
+            func.count(Products.id).label("product_count"),
+            func.min(Products.price).label("min_price"),
+            func.max(Products.price).label("max_price"),
+        ).outerjoin(Products, and_(
+            Products.category_id == Categories.category_id,
+            Products.is_active.is_(True),
+        )).group_by(
+            Categories.category_id,
+            Categories.category_name,
+            Categories.description)
+        if category_ids is not None:
+            query = query.filter(Categories.category_id.in_(category_ids))
+        return {
+            row.category_id: {
+                "category_id": row.category_id,
+                "category_name": row.category_name,
+                "description": row.description,
+                "product_count": row.product_count,
+                "min_price": None if row.min_price is None else float(row.min_price),
+                "max_price": None if row.max_price is None else float(row.max_price),
+            }
+            for row in query.all()
+        }
+
+    def items(self, db: Session):
+        """(version, entries ordered by id); rebuilds if another process wrote."""
+        current = versions.get(VERSION_KEY)
+        if current != self.version:
+            entries = self._aggregate(db)
+            with self._lock:
+                self._entries = entries
+                self.version = current
+        with self._lock:
+            return self.version, [
+                self._entries[key] for key in sorted(self._entries)]
+
+    def refresh(self, db: Session, category_ids):
+        """Re-aggregate category_ids (None entries are ignored) after a write."""
+        category_ids = {cid for cid in category_ids if cid is not None}
+        with self._lock:
+            built = self.version
+            new = versions.bump(VERSION_KEY)
+        # patch in place only if nobody else wrote since the last build;
+        # otherwise leave the version stale so the next read rebuilds
+        if built is None or _counter(new) != _counter(built) + 1:
+            return
+        # the query runs unlocked so reads keep being served meanwhile; it
+        # starts after the bump, so any write it misses bumps past `new`
+        fresh = self._aggregate(db, category_ids) if category_ids else {}
+        with self._lock:
+            if self.version != built:
+                # rebuilt or patched by someone else in the meantime
+                return
+            for category_id in category_ids:
+                if category_id in fresh:
+                    self._entries[category_id] = fresh[category_id]
+                else:
+                    self._entries.pop(category_id, None)
+            self.version = new
+
+    def invalidate(self):
+        """Next read rebuilds everything (bulk writes)."""
+        versions.bump(VERSION_KEY)
+
+
+category_snapshot = CategorySnapshot()
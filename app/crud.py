@@ -1,9 +1,20 @@
-from decimal import Decimal
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from app.models import Cart, Cart_Items, Orders, OrderItem, Products
 from app.models import Cart, Products, Cart_Items
-from sqlalchemy.orm import Session
-from app import models, schemas
-from app.utils import hash_password
+from sqlalchemy import case, func, insert, literal, literal_column, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app import models, schemas, search
+from app.cache import build_cache, row_snapshot, detached_from_snapshot
+from app.http_cache import versions
+from app.category_snapshot import category_snapshot
+from app.utils import hash_password, invalidate_principal
 from app.models import Products
 
 # -------------------- USERS --------------------
@@ -16,7 +27,7 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_id(db: Session, user_id: int):
     return db.query(
         models.Users).filter(
-        models.Users.user_id == user_id).first()
+        models.Users.id == user_id).first()
 
 
 def create_user(db: Session, user: schemas.UserCreate, hashed_password: str):
@@ -43,6 +54,7 @@ def update_user_role(db: Session, user_id: int, new_role: str):
     if user:
         user.role = new_role
         db.commit()
+        invalidate_principal(user_id)
         db.refresh(user)
         return user
     return None
@@ -51,8 +63,12 @@ def update_user_role(db: Session, user_id: int, new_role: str):
 def delete_user(db: Session, user_id: int):
     user = get_user_by_id(db, user_id)
     if user:
+        remove_user_reviews_from_ratings(db, user_id)
         db.delete(user)
         db.commit()
+        invalidate_principal(user_id)
+        # their reviews went with them
+        versions.bump("reviews")
         return True
     return False
 
@@ -67,6 +83,8 @@ def create_category(db: Session, category: schemas.CategoryCreate):
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
+    versions.bump("categories")
+    category_snapshot.refresh(db, [new_category.category_id])
     return new_category
 
 
@@ -90,6 +108,10 @@ def update_category(
     category.description = updated.description
     db.commit()
     db.refresh(category)
+    # cached products embed their category
+    product_cache.clear()
+    versions.bump("categories", "products")
+    category_snapshot.refresh(db, [category_id])
     return category
 
 
@@ -99,6 +121,9 @@ def delete_category(db: Session, category_id: int):
         return None
     db.delete(category)
     db.commit()
+    product_cache.clear()
+    versions.bump("categories", "products")
+    category_snapshot.refresh(db, [category_id])
     return True
 
 # -------------------- PRODUCTS --------------------
@@ -115,22 +140,229 @@ def create_product(db: Session, payload: schemas.ProductCreate):
         category_id=payload.category_id,
         is_active=payload.is_active
     )
-
-    product_data = payload.model_dump()
-    product = models.Products(**product_data)
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    search.product_index.upsert(db_product)
+    versions.bump("products")
+    category_snapshot.refresh(db, [db_product.category_id])
     return db_product
 
 
+# Read-through cache of product rows (with their category), keyed by id.
+# Entries are plain column dicts; a hit is attached to the caller's session
+# with merge(load=False), so it behaves like a loaded row without a SELECT.
+product_cache = build_cache(
+    "product",
+    maxsize=int(os.getenv("PRODUCT_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRODUCT_CACHE_TTL", "300")))
+
+
+def cache_product(product):
+    product_cache.set(product.id, {
+        "product": row_snapshot(product),
+        "category": row_snapshot(product.category) if product.category else None,
+    })
+
+
+def cached_product_objects(snapshot):
+    """Detached (product, category) instances rebuilt from a cache entry."""
+    product = detached_from_snapshot(models.Products, snapshot["product"])
+    category = None
+    if snapshot["category"]:
+        category = detached_from_snapshot(
+            models.Categories, snapshot["category"])
+    return product, category
+
+
+def _merge_cached(db: Session, snapshot):
+    product, category = cached_product_objects(snapshot)
+    merged = db.merge(product, load=False)
+    # attach the category as loaded: the identity map only holds weak
+    # references, so merging it on its own would not stop a lazy load
+    set_committed_value(
+        merged, "category",
+        db.merge(category, load=False) if category is not None else None)
+    return merged
+
+
+def invalidate_products(product_ids):
+    for product_id in product_ids:
+        product_cache.delete(product_id)
+    versions.bump("products")
+
+
 def get_product(db: Session, product_id: int):
-    return db.query(models.Products).filter(
+    snapshot = product_cache.get(product_id)
+    if snapshot is not None:
+        return _merge_cached(db, snapshot)
+    product = db.query(models.Products).options(
+        selectinload(models.Products.category)).filter(
         models.Products.id == product_id).first()
+    if product:
+        cache_product(product)
+    return product
 
 
-def list_products(db: Session):
-    return db.query(models.Products).all()
+def get_products_by_ids(db: Session, product_ids):
+    """{id: product} for the given ids; cache misses are loaded in one query."""
+    found = {}
+    missing = []
+    for product_id in set(product_ids):
+        snapshot = product_cache.get(product_id)
+        if snapshot is not None:
+            found[product_id] = _merge_cached(db, snapshot)
+        else:
+            missing.append(product_id)
+    if missing:
+        products = db.query(Products).options(
+            selectinload(Products.category)).filter(
+            Products.id.in_(missing)).all()
+        for product in products:
+            cache_product(product)
+            found[product.id] = product
+    return found
+
+
+# Columns selected by the FAST_JSON list endpoints (see app/fast_json.py),
+# matching the fields of the corresponding response models.
+PRODUCT_ROW_COLUMNS = (
+    Products.id,
+    Products.name,
+    Products.description,
+    Products.price,
+    Products.discount_price,
+    Products.stock_qty,
+    Products.brand,
+    Products.is_active,
+    Products.created_at,
+    Products.review_count,
+    Products.rating_avg,
+    Products.rating_1_count,
+    Products.rating_2_count,
+    Products.rating_3_count,
+    Products.rating_4_count,
+    Products.rating_5_count,
+    models.Categories.category_id,
+    models.Categories.category_name,
+    models.Categories.description.label("category_description"),
+)
+
+ORDER_ROW_COLUMNS = (
+    models.Orders.id,
+    models.Orders.user_id,
+    models.Orders.total_amount,
+    models.Orders.status,
+    models.Orders.created_at,
+)
+
+USER_ROW_COLUMNS = (
+    models.Users.id,
+    models.Users.first_name,
+    models.Users.last_name,
+    models.Users.email,
+    models.Users.phone_number,
+    models.Users.role,
+    models.Users.created_at,
+)
+
+
+# sort name -> (sort column, descending); every sort is tie-broken on id
+PRODUCT_SORTS = {
+    "newest": (Products.created_at, True),
+    "price_asc": (Products.price, False),
+    "price_desc": (Products.price, True),
+    "rating": (Products.rating_avg, True),
+    "most_reviewed": (Products.review_count, True),
+}
+
+
+def _encode_cursor(value, product_id: int) -> str:
+    value = value.isoformat() if isinstance(value, datetime) else str(value)
+    raw = json.dumps([value, product_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str, sort: str):
+    try:
+        value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        python_type = PRODUCT_SORTS[sort][0].type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        else:
+            # Decimal for prices and ratings, int for review counts
+            value = python_type(value)
+        return value, int(product_id)
+    except (ValueError, TypeError, binascii.Error, InvalidOperation):
+        raise ValueError("Invalid cursor")
+
+
+def list_products(
+        db: Session,
+        category_id: int = None,
+        brand: str = None,
+        min_price: float = None,
+        max_price: float = None,
+        is_active: bool = None,
+        in_stock: bool = None,
+        sort: str = "newest",
+        cursor: str = None,
+        limit: int = 20,
+        as_rows: bool = False):
+    """
+    Keyset-paginated catalog listing.
+    Returns (products, next_cursor); next_cursor is None on the last page.
+    With as_rows, products are PRODUCT_ROW_COLUMNS rows instead of ORM objects.
+    """
+    if sort not in PRODUCT_SORTS:
+        raise ValueError(f"Unknown sort '{sort}'")
+    sort_col, descending = PRODUCT_SORTS[sort]
+
+    if as_rows:
+        query = db.query(*PRODUCT_ROW_COLUMNS).outerjoin(
+            models.Categories,
+            Products.category_id == models.Categories.category_id)
+    else:
+        query = db.query(Products).options(selectinload(Products.category))
+    if category_id is not None:
+        query = query.filter(Products.category_id == category_id)
+    if brand is not None:
+        query = query.filter(Products.brand == brand)
+    if min_price is not None:
+        query = query.filter(Products.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Products.price <= max_price)
+    if is_active is not None:
+        query = query.filter(Products.is_active == is_active)
+    if in_stock is not None:
+        query = query.filter(
+            Products.stock_qty > 0 if in_stock else Products.stock_qty <= 0)
+
+    key = tuple_(sort_col, Products.id)
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor, sort)
+        # compare against the sort value as the database stored it: a bound
+        # datetime is rendered differently from what SQLite's CURRENT_TIMESTAMP
+        # wrote, so it would not match the cursor row itself. The value in the
+        # cursor only stands in if that row has been deleted since
+        stored = select(sort_col).where(Products.id == last_id).scalar_subquery()
+        last = tuple_(
+            func.coalesce(stored, literal(last_value, sort_col.type)),
+            literal(last_id))
+        query = query.filter(key < last if descending else key > last)
+    if descending:
+        query = query.order_by(sort_col.desc(), Products.id.desc())
+    else:
+        query = query.order_by(sort_col.asc(), Products.id.asc())
+
+    products = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last_product = products[-1]
+        next_cursor = _encode_cursor(
+            getattr(last_product, sort_col.key), last_product.id)
+    return products, next_cursor
 
 
 def update_product(
@@ -140,6 +372,7 @@ def update_product(
     product = get_product(db, product_id)
     if not product:
         return None
+    old_category_id = product.category_id
     if payload.product_name is not None:
         product.name = payload.product_name
     if payload.description is not None:
@@ -162,7 +395,10 @@ def update_product(
         setattr(product, key, value)
 
     db.commit()
+    invalidate_products([product_id])
     db.refresh(product)
+    search.product_index.upsert(product)
+    category_snapshot.refresh(db, [old_category_id, product.category_id])
     return product
 
 
@@ -170,87 +406,106 @@ def delete_product(db: Session, product_id: int):
     product = get_product(db, product_id)
     if not product:
         return None
+    category_id = product.category_id
     db.delete(product)
     db.commit()
+    invalidate_products([product_id])
+    search.product_index.remove(product_id)
+    category_snapshot.refresh(db, [category_id])
     return True
 
 
-
-def get_product_by_name(db: Session, name: str):
-    return (
+def search_products(db: Session, q: str, limit: int = 20, offset: int = 0):
+    """Products matching q, best match first."""
+    ids = search.search_product_ids(db, q, limit=limit, offset=offset)
+    if not ids:
+        return []
+    products = (
         db.query(Products)
-        .filter(Products.name.ilike(f"%{name}%"))
-        .first()
+        .options(selectinload(Products.category))
+        .filter(Products.id.in_(ids))
+        .all()
     )
+    by_id = {p.id: p for p in products}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def get_product_by_name(db: Session, name: str):
+    results = search_products(db, name, limit=1)
+    return results[0] if results else None
+
 
+def get_products_by_names(db: Session, names):
+    """{lowercased name: product} for exact (case-insensitive) name matches."""
+    lowered = {name.lower() for name in names}
+    if not lowered:
+        return {}
+    products = db.query(Products).filter(
+        func.lower(Products.name).in_(lowered)).all()
+    return {product.name.lower(): product for product in products}
+
+
+
+# -------------------- ADDRESSES --------------------
+
+
+def get_default_shipping_address_id(db: Session, user_id: int):
+    """The user's default shipping address, else their first one, else None."""
+    row = db.query(models.Addresses.address_id).filter(
+        models.Addresses.user_id == user_id).order_by(
+        models.Addresses.is_default_shipping.desc().nullslast(),
+        models.Addresses.address_id).first()
+    return row.address_id if row else None
 
 
 # -------------------- CARTS --------------------
 
 def add_item_to_cart(db: Session, user, product_id: int, quantity: int):
-    # Get or create the user's cart
-    cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-    if not cart:
-        cart = Cart(user_id=user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
+    cart = get_or_create_cart_for_user(db, user)
 
-    # Check if the product is already in cart
-    cart_item = db.query(Cart_Items).filter(
-        Cart_Items.cart_id == cart.cart_id,
-        Cart_Items.product_id == product_id
-    ).first()
+    def find_item():
+        return db.query(Cart_Items).filter(
+            Cart_Items.cart_id == cart.cart_id,
+            Cart_Items.product_id == product_id
+        ).first()
 
-    if cart_item:
-        cart_item.quantity += quantity
-        db.commit()
-        db.refresh(cart_item)
-    else:
+    # Check if the product is already in cart
+    cart_item = find_item()
+    if not cart_item:
         cart_item = Cart_Items(
             cart_id=cart.cart_id,
             product_id=product_id,
             quantity=quantity)
         db.add(cart_item)
-        db.commit()
-        db.refresh(cart_item)
-
+        try:
+            db.commit()
+            db.refresh(cart_item)
+            return cart_item
+        except IntegrityError:
+            # a concurrent request added the line first (unique per cart and
+            # product); add to it instead
+            db.rollback()
+            cart_item = find_item()
+            if not cart_item:
+                raise
+
+    cart_item.quantity = Cart_Items.quantity + quantity
+    db.commit()
+    db.refresh(cart_item)
     return cart_item
 
 
-def list_cart_items(db: Session, user):
-    # Get the user's cart
-    cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-    if not cart:
-        return []  # Empty list if no cart exists
-
-    # Get all items in the cart
-    items = db.query(Cart_Items).filter(
-        Cart_Items.cart_id == cart.cart_id).all()
-
-    # Optionally, include product details
-    cart_list = []
-    for item in items:
-        product = db.query(Products).filter(
-            Products.id == item.product_id).first()
-        cart_list.append({
-            "cart_item_id": item.cart_item_id,
-            "product_id": item.product_id,
-            "product_name": product.name if product else "Unknown",
-            "quantity": item.quantity,
-            "price": product.price if product else 0,
-            "discount_price": product.discount_price if product else 0
-        })
-
-    return cart_list
-
-
 def get_or_create_cart_for_user(db: Session, user):
     cart = db.query(Cart).filter(Cart.user_id == user.id).first()
     if not cart:
         cart = Cart(user_id=user.id)
         db.add(cart)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # created concurrently; cart.user_id is unique
+            db.rollback()
+            return db.query(Cart).filter(Cart.user_id == user.id).one()
         db.refresh(cart)
     return cart
 
@@ -271,83 +526,176 @@ def remove_item_from_cart(db: Session, user, cart_item_id: int):
 
 
 
-def list_cart_items(db: Session, user):
-    cart = db.query(Cart).filter(Cart.user_id == user.id).first()
+def get_cart_with_items(db: Session, user):
+    """
+    The user's cart (created if missing) with items, products and categories
+    loaded up front: one query each for the cart, its items, uncached
+    products and their categories, however many items there are.
+    """
+    cart = db.query(Cart).options(selectinload(Cart.cart_items)).filter(
+        Cart.user_id == user.id).first()
     if not cart:
-        return []
-    items = db.query(Cart_Items).filter(
-        Cart_Items.cart_id == cart.cart_id).all()
-    return items
+        return get_or_create_cart_for_user(db, user)
+    products = get_products_by_ids(
+        db, [item.product_id for item in cart.cart_items])
+    for item in cart.cart_items:
+        # attached as loaded, so serializing the items never lazy-loads
+        set_committed_value(item, "product", products.get(item.product_id))
+    return cart
 
 # -------------------- ORDERS --------------------
 
-def create_order_from_cart(
-        db: Session,
-        user,
-        shipping_address_id: int = None,
-        billing_address_id: int = None):
-    """
-    Create an order from everything in user's cart.
-    Policy: If any cart item quantity > product.stock_qty => raise ValueError (reject full order).
+def _unit_price(product) -> Decimal:
+    price = product.price - product.discount_price if product.discount_price is not None and product.discount_price > 0 else product.price
+    # ensure Decimal math if using Numeric
+    return Decimal(str(price)) if price is not None else Decimal(0)
+
+
+def _create_locked_order(db: Session, user, quantities: dict, allow_partial: bool = False):
     """
-    cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-    if not cart or not cart.cart_items:
-        raise ValueError("Cart is empty")
+    Write an order for {product_id: quantity} inside the caller's transaction
+    (no commit). Returns (order, {product_id: quantity actually ordered}).
 
-    # Validate stock for all items first
-    for cart_item in cart.cart_items:
-        product = db.query(Products).filter(
-            Products.id == cart_item.product_id).first()
+    The products are read once with SELECT ... FOR UPDATE in id order, so
+    concurrent orders of the same product queue up instead of overselling,
+    and always lock in the same order so they cannot deadlock.
+
+    By default any missing product or short stock raises ValueError. With
+    allow_partial, quantities are cut down to the available stock and
+    missing or sold-out products are skipped.
+    """
+    products = {
+        product.id: product
+        for product in db.query(Products)
+        .filter(Products.id.in_(quantities))
+        .order_by(Products.id)
+        .with_for_update()
+        .populate_existing()
+    }
+
+    ordered = {}
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        available = product.stock_qty if product and product.stock_qty else 0
+        if allow_partial:
+            if available > 0:
+                ordered[product_id] = min(quantity, available)
+            continue
         if not product:
-            raise ValueError(f"Product id {cart_item.product_id} not found")
+            raise ValueError(f"Product id {product_id} not found")
         if product.stock_qty is None:
             raise ValueError(
                 f"Product id {product.id} has no stock information")
-        if cart_item.quantity > product.stock_qty:
+        if quantity > product.stock_qty:
             raise ValueError(
-                f"Not enough stock for product id {product.id}. Requested {cart_item.quantity}, available {product.stock_qty}")
+                f"Not enough stock for product id {product.id}. Requested {quantity}, available {product.stock_qty}")
+        ordered[product_id] = quantity
+    if not ordered:
+        raise ValueError("None of the requested products are in stock")
 
-    order = Orders(user_id=user.id, total_amount=0, status="pending")   
-    
     order = Orders(user_id=user.id, total_amount=0, status="pending")
-    
     db.add(order)
-    db.commit()
-    db.refresh(order)
+    db.flush()
 
     total_amount = Decimal(0)
+    order_items = []
+    for product_id, quantity in ordered.items():
+        price_val = _unit_price(products[product_id])
+        total_amount += price_val * Decimal(quantity)
+        order_items.append({
+            "order_id": order.id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "price": float(price_val),
+        })
+    db.execute(insert(OrderItem), order_items)
+
+    # one UPDATE for every product in the order. The stock condition repeats
+    # the check above for databases that ignore FOR UPDATE (SQLite), where
+    # another order may have taken the stock since it was read
+    taken = case(ordered, value=Products.id)
+    updated = db.execute(
+        update(Products)
+        .where(Products.id.in_(ordered), Products.stock_qty >= taken)
+        .values(stock_qty=Products.stock_qty - taken)
+        .execution_options(synchronize_session=False))
+    if updated.rowcount != len(ordered):
+        raise ValueError("Not enough stock: it was ordered by someone else, try again")
 
-    # Move each cart item to order_items and reduce stock
-    for cart_item in cart.cart_items:
-        product = db.query(Products).filter(
-            Products.id == cart_item.product_id).first()
-        price = product.price - product.discount_price if product.discount_price is not None and product.discount_price > 0 else product.price
-        # ensure Decimal math if using Numeric
-        price_val = Decimal(str(price)) if price is not None else Decimal(0)
-        total_amount += price_val * Decimal(cart_item.quantity)
+    order.total_amount = total_amount
+    return order, ordered
 
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=float(price_val)
-        )
-        db.add(order_item)
 
-        # reduce stock
-        product.stock_qty = product.stock_qty - cart_item.quantity
-        db.add(product)
+def create_order_from_cart(
+        db: Session,
+        user,
+        shipping_address_id: int = None,
+        billing_address_id: int = None):
+    """
+    Create an order from everything in user's cart, in a single transaction.
+    Policy: If any cart item quantity > product.stock_qty => raise ValueError (reject full order).
 
-    # finalize order
-    order.total_amount = total_amount
-    db.commit()
+    The cart row is locked (before the products, always in that order) and
+    its items are read under the lock, so a second submit of the same cart
+    waits and then finds it empty instead of ordering the lines again.
+    """
+    try:
+        cart = (
+            db.query(Cart)
+            .options(selectinload(Cart.cart_items))
+            .filter(Cart.user_id == user.id)
+            .with_for_update()
+            .populate_existing()
+            .first())
+        if not cart or not cart.cart_items:
+            raise ValueError("Cart is empty")
+
+        quantities = {}
+        for cart_item in cart.cart_items:
+            quantities[cart_item.product_id] = (
+                quantities.get(cart_item.product_id, 0) + cart_item.quantity)
+
+        # claim the lines first; where FOR UPDATE is ignored (SQLite) a
+        # concurrent submit may already have taken them
+        item_ids = [cart_item.cart_item_id for cart_item in cart.cart_items]
+        claimed = db.query(Cart_Items).filter(
+            Cart_Items.cart_item_id.in_(item_ids)).delete(synchronize_session=False)
+        if claimed != len(item_ids):
+            raise ValueError("Cart changed while checking out, try again")
+
+        order, _ = _create_locked_order(db, user, quantities)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_products(quantities)
     db.refresh(order)
+    return order
 
-    # clear cart items
-    db.query(Cart_Items).filter(Cart_Items.cart_id == cart.cart_id).delete()
-    db.commit()
 
-    return order
+def create_order_for_items(
+        db: Session,
+        user,
+        quantities: dict,
+        shipping_address_id: int = None,
+        billing_address_id: int = None,
+        allow_partial: bool = False):
+    """
+    Create one multi-line order for {product_id: quantity} in a single
+    transaction. Returns (order, {product_id: quantity ordered}).
+    """
+    try:
+        order, ordered = _create_locked_order(
+            db, user, quantities, allow_partial=allow_partial)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_products(ordered)
+    db.refresh(order)
+    return order, ordered
 
 
 def create_order_buy_now(
@@ -360,40 +708,75 @@ def create_order_buy_now(
     """
     Create an order directly for a single product (Buy Now).
     Same stock policy: fail if insufficient stock.
+
+    Stock is taken with one conditional UPDATE ... RETURNING instead of
+    read-compare-write, so concurrent buyers can neither lose updates nor
+    oversell, and the row is only locked for the rest of this transaction.
     """
-    product = db.query(Products).filter(Products.id == product_id).first()
-    if not product:
-        raise ValueError("Product not found")
-    if quantity > product.stock_qty:
-        raise ValueError(
-            f"Not enough stock for product id {product.id}." 
-            f"Requested {quantity}, available {product.stock_qty}")
+    try:
+        reserved = db.execute(
+            update(Products)
+            .where(Products.id == product_id, Products.stock_qty >= quantity)
+            .values(stock_qty=Products.stock_qty - quantity)
+            .returning(Products.price, Products.discount_price)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if reserved is None:
+            current = db.query(Products.stock_qty).filter(
+                Products.id == product_id).first()
+            if current is None:
+                raise ValueError("Product not found")
+            raise ValueError(
+                f"Not enough stock for product id {product_id}. "
+                f"Requested {quantity}, available {current.stock_qty}")
+
+        price_val = _unit_price(reserved)
+        order = Orders(
+            user_id=user.id,
+            total_amount=price_val * Decimal(quantity),
+            status="pending")
+        db.add(order)
+        db.flush()
+
+        db.add(OrderItem(
+            order_id=order.id,
+            product_id=product_id,
+            quantity=quantity,
+            price=float(price_val)
+        ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    order = Orders(user_id=user.id, total_amount=0, status="pending")
-    db.add(order)
-    db.commit()
+    invalidate_products([product_id])
     db.refresh(order)
+    return order
 
-    price = product.price - product.discount_price if product.discount_price is not None and product.discount_price > 0 else product.price
-    price_val = Decimal(str(price)) if price is not None else Decimal(0)
-    total_amount = price_val * Decimal(quantity)
-
-    order_item = OrderItem(
-        order_id=order.id,
-        product_id=product.id,
-        quantity=quantity,
-        price=float(price_val)
-    )
-    db.add(order_item)
 
-    product.stock_qty = product.stock_qty - quantity
-    db.add(product)
+# orders waiting for a shipment; see routers/shipping.create_shipping
+READY_TO_SHIP_STATUS = "paid"
 
-    order.total_amount = total_amount
-    db.commit()
-    db.refresh(order)
 
-    return order
+def list_ready_to_ship(db: Session, after: int = None, limit: int = 50,
+                       as_rows: bool = False):
+    """
+    Oldest paid orders first, keyset-paginated on id (served by the partial
+    index ix_orders_ready_to_ship). Returns (orders, next_cursor).
+    """
+    query = db.query(*ORDER_ROW_COLUMNS) if as_rows else db.query(Orders)
+    # inlined rather than bound: a planner can only prove the partial
+    # index's WHERE status = 'paid' from a literal
+    query = query.filter(
+        Orders.status == literal(READY_TO_SHIP_STATUS, literal_execute=True))
+    if after is not None:
+        query = query.filter(Orders.id > after)
+    orders = query.order_by(Orders.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = orders[-1].id
+    return orders, next_cursor
 
 
 def get_orders_for_user(db: Session, user: models.Users):
@@ -402,14 +785,77 @@ def get_orders_for_user(db: Session, user: models.Users):
         models.Orders.user_id == user.id).all()
 
 
+def _rating_avg(rating_sum, review_count):
+    # * 1.0 (a numeric literal): CAST(... AS NUMERIC) is still an integer
+    # on SQLite, where the division would truncate
+    return case(
+        (review_count > 0,
+         func.round(rating_sum * literal_column("1.0") / review_count, 2)),
+        else_=0)
+
+
 def create_review(db, user, payload: schemas.ReviewCreate):
-    review = models.Reviews(
-        user_id=user.id,
-        product_id=payload.product_id,
-        rating=payload.rating,
-        comment=payload.comment
-    )
-    db.add(review)
-    db.commit()
+    # the product's rating summary is updated in the same transaction as the
+    # insert; SET expressions all see the row's old values
+    rating_count = getattr(Products, f"rating_{payload.rating}_count")
+    try:
+        result = db.execute(
+            update(Products)
+            .where(Products.id == payload.product_id)
+            .values({
+                Products.review_count: Products.review_count + 1,
+                Products.rating_sum: Products.rating_sum + payload.rating,
+                rating_count: rating_count + 1,
+                Products.rating_avg: _rating_avg(
+                    Products.rating_sum + payload.rating,
+                    Products.review_count + 1),
+            }))
+        if result.rowcount == 0:
+            raise ValueError("Product not found")
+        review = models.Reviews(
+            user_id=user.id,
+            product_id=payload.product_id,
+            rating=payload.rating,
+            comment=payload.comment
+        )
+        db.add(review)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(review)
-    return review
\ No newline at end of file
+    invalidate_products([payload.product_id])
+    versions.bump("reviews")
+    return review
+
+
+def remove_user_reviews_from_ratings(db, user_id: int):
+    """
+    Take a user's reviews out of the product rating summaries before the
+    user (and, by cascade, the reviews) is deleted. Does not commit.
+    """
+    rows = db.query(
+        models.Reviews.product_id,
+        models.Reviews.rating,
+        func.count()).filter(
+        models.Reviews.user_id == user_id).group_by(
+        models.Reviews.product_id, models.Reviews.rating).all()
+    removed = {}
+    for product_id, rating, count in rows:
+        removed.setdefault(product_id, {})[rating] = count
+    for product_id, by_rating in removed.items():
+        count = sum(by_rating.values())
+        total = sum(rating * n for rating, n in by_rating.items())
+        values = {
+            Products.review_count: Products.review_count - count,
+            Products.rating_sum: Products.rating_sum - total,
+            Products.rating_avg: _rating_avg(
+                Products.rating_sum - total, Products.review_count - count),
+        }
+        for rating, n in by_rating.items():
+            column = getattr(Products, f"rating_{rating}_count")
+            values[column] = column - n
+        db.execute(
+            update(Products).where(Products.id == product_id).values(values))
+    if removed:
+        invalidate_products(removed)
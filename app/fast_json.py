@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional speedup, falls back to the stdlib encoder
+    orjson = None
+
+# Opt-in: list endpoints select plain column rows and encode them directly
+# instead of loading ORM objects and validating them through response models.
+FAST_JSON = os.getenv("FAST_JSON", "").lower() in ("1", "true", "yes")
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, separators=(",", ":")).encode()
+
+
+def json_response(data, status_code: int = 200) -> Response:
+    return Response(
+        content=dumps(data),
+        status_code=status_code,
+        media_type="application/json")
+
+
+def rows(result_rows):
+    """Row objects -> list of dicts keyed by column label."""
+    return [row._asdict() for row in result_rows]
+
+
+def product_row(row) -> dict:
+    """A crud.PRODUCT_ROW_COLUMNS row in ProductOut's shape."""
+    data = row._asdict()
+    category_id = data.pop("category_id")
+    category_name = data.pop("category_name")
+    category_description = data.pop("category_description")
+    data["category"] = None if category_id is None else {
+        "category_id": category_id,
+        "category_name": category_name,
+        "description": category_description,
+    }
+    # str keys: orjson rejects others (the response model's JSON has them too)
+    data["rating_histogram"] = {
+        str(rating): data.pop(f"rating_{rating}_count") for rating in range(1, 6)
+    }
+    return data
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from argon2 import (
+    DEFAULT_MEMORY_COST,
+    DEFAULT_PARALLELISM,
+    DEFAULT_TIME_COST,
+    PasswordHasher,
+)
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
+
+# Kept free of app imports: worker processes import this module to run the
+# hashing functions and should not build engines or load models.
+
+ph = PasswordHasher(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", DEFAULT_TIME_COST)),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", DEFAULT_MEMORY_COST)),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", DEFAULT_PARALLELISM)),
+)
+
+
+def hash_password(password: str) -> str:
+    return ph.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return ph.verify(hashed_password, plain_password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
+
+
+def verify_and_rehash(plain_password: str, hashed_password: str):
+    """
+    (matches, new_hash). new_hash is set when the password matched but was
+    hashed with different parameters than the current ones.
+    """
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if ph.check_needs_rehash(hashed_password):
+        return True, ph.hash(plain_password)
+    return True, None
+
+
+class HashingPoolFull(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Process pool for Argon2 work, sized separately from the web threadpool.
+    At most max_pending jobs may be queued or running; beyond that callers
+    get HashingPoolFull instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingPoolFull("Password hashing queue is full")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64")),
+)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    """Async verify_and_rehash()."""
+    return await hashing_pool.run(
+        verify_and_rehash, plain_password, hashed_password)
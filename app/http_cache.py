@@ -0,0 +1,116 @@
+import os
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+
+# max-age for catalog responses; clients/CDNs revalidate with If-None-Match
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+
+
+class TableVersions:
+    """
+    Write counters per table, used as ETags for list endpoints so a
+    conditional GET costs at most one primary-key lookup.
+
+    Kept in Redis when CACHE_REDIS_URL is set, otherwise in the
+    table_versions table of the primary database (app.database binds the
+    engine). Either way every worker sees every other worker's writes; an
+    in-process counter would let a worker answer 304 to a client holding
+    data another worker has since changed.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._engine = None
+        redis_url = os.getenv("CACHE_REDIS_URL")
+        if redis_url:
+            import redis
+            self._client = redis.Redis.from_url(redis_url)
+
+    def use_database(self, engine):
+        """Keep the counters in engine's table_versions (unless Redis is set)."""
+        self._engine = engine
+
+    def get(self, table: str) -> str:
+        if self._client is not None:
+            return (self._client.get(f"version:{table}") or b"0").decode()
+        with self._engine.connect() as conn:
+            version = conn.execute(
+                text("SELECT version FROM table_versions WHERE name = :name"),
+                {"name": table}).scalar()
+        return str(version or 0)
+
+    def bump(self, *tables: str) -> str:
+        """Increments each table's counter; returns the last one's new version."""
+        version = None
+        now = time.time()
+        for table in tables:
+            if self._client is not None:
+                version = str(self._client.incr(f"version:{table}"))
+                self._client.set(f"version_at:{table}", now)
+                continue
+            try:
+                version = self._bump_row(table, now)
+            except IntegrityError:
+                # another worker inserted the table's first row meanwhile
+                version = self._bump_row(table, now)
+        return version
+
+    def _bump_row(self, table: str, now: float) -> str:
+        params = {"name": table, "now": now}
+        with self._engine.begin() as conn:
+            updated = conn.execute(text(
+                "UPDATE table_versions SET version = version + 1, changed_at = :now "
+                "WHERE name = :name"), params)
+            if updated.rowcount == 0:
+                conn.execute(text(
+                    "INSERT INTO table_versions (name, version, changed_at) "
+                    "VALUES (:name, 1, :now)"), params)
+            # read under the row lock the UPDATE/INSERT took
+            return str(conn.execute(
+                text("SELECT version FROM table_versions WHERE name = :name"),
+                params).scalar())
+
+    def changed_within(self, seconds: float, *tables: str) -> bool:
+        """True if any of the tables was bumped in the last `seconds`."""
+        cutoff = time.time() - seconds
+        if self._client is not None:
+            stamps = self._client.mget([f"version_at:{table}" for table in tables])
+            return any(stamp is not None and float(stamp) > cutoff for stamp in stamps)
+        with self._engine.connect() as conn:
+            latest = conn.execute(
+                text("SELECT max(changed_at) FROM table_versions WHERE name IN :names")
+                .bindparams(bindparam("names", expanding=True)),
+                {"names": list(tables)}).scalar()
+        return latest is not None and latest > cutoff
+
+
+versions = TableVersions()
+
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def cache_headers(etag: str, max_age: int = CATALOG_MAX_AGE) -> dict:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the request's If-None-Match matches etag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+
+def apply(response: Response, etag: str) -> Response:
+    response.headers.update(cache_headers(etag))
+    return response
@@ -2,9 +2,17 @@ from fastapi import FastAPI, Depends
 from fastapi.responses import JSONResponse
 from fastapi.requests import Request
 from fastapi import status
-from .database import engine, Base
+from sqlalchemy.orm import Session
+from .database import engine, Base, get_db
 from . import models
+from .hashing import hashing_pool
+from .metrics import instrument
 from app.agent.graph import build_agent
+from app.agent.fake_llm import build_fake_llm
+from app.agent.extraction_cache import ExtractionCache
+from app.agent.batch import BatchAgent
+from app.agent.limits import limiter_from_env
+from app.agent.parser import ProductNameIndex
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
@@ -17,28 +25,63 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="Ecommerce API")
+# per-request query count / DB time: Server-Timing, logs and /admin/metrics
+app.middleware("http")(instrument)
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0,
-    api_key=GROQ_API_KEY
-)
+if os.getenv("AGENT_FAKE_LLM"):
+    # offline model for load testing the agent
+    llm = build_fake_llm(latency=float(os.getenv("AGENT_FAKE_LLM_LATENCY", "0.3")))
+else:
+    llm = ChatGroq(
+        model="llama-3.1-8b-instant",
+        temperature=0,
+        api_key=GROQ_API_KEY
+    )
 
 
-agent = build_agent(llm)
+# shared by the single-item and batch agents, so the LLM limits are global
+llm_limiter = limiter_from_env()
+name_index = ProductNameIndex()
+extraction_cache = ExtractionCache.from_env()
+agent = build_agent(
+    llm, limiter=llm_limiter, cache=extraction_cache, name_index=name_index)
+batch_agent = BatchAgent(llm, llm_limiter, name_index)
 
 from typing import Optional
-from . import utils
+from . import schemas, utils
 
 @app.post("/agent/order")
-def agent_order(
+async def agent_order(
     query: str,
+    db: Session = Depends(get_db),
     user: Optional[models.Users] = Depends(utils.get_current_user_optional)
 ):
-    result = agent.invoke({"user_query": query, "user": user})
+    # get_db is cached per request, so `user` is bound to this same session
+    result = await agent.ainvoke({"user_query": query, "user": user, "db": db})
     return {"message": result["response"]}
 
 
+@app.post("/agent/order/batch")
+async def agent_order_batch(
+    payload: schemas.AgentBatchRequest,
+    db: Session = Depends(get_db),
+    user: Optional[models.Users] = Depends(utils.get_current_user_optional)
+):
+    return await batch_agent.order(payload.queries, user, db)
+
+
+@app.get("/agent/cache/stats")
+def agent_cache_stats(
+    admin: models.Users = Depends(utils.get_current_admin_user)
+):
+    return extraction_cache.stats()
+
+
+@app.on_event("shutdown")
+def shutdown_hashing_pool():
+    hashing_pool.shutdown()
+
+
 @app.exception_handler(404)
 async def custom_404_handler(request: Request, exc):
     return JSONResponse(
@@ -47,7 +90,7 @@ async def custom_404_handler(request: Request, exc):
     )
 
 # include routers
-from .routers import auth, users, addresses, categories, products, cart, orders, payments, reviews, shipping
+from .routers import auth, users, addresses, categories, products, cart, orders, payments, reviews, shipping, admin
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -58,4 +101,5 @@ app.include_router(cart.router)
 app.include_router(orders.router)
 app.include_router(payments.router)
 app.include_router(reviews.router)
-app.include_router(shipping.router)
\ No newline at end of file
+app.include_router(shipping.router)
+app.include_router(admin.router)
\ No newline at end of file
@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+logger = logging.getLogger("app.metrics")
+
+# statements slower than this are logged with their SQL
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# requests per route kept for the rolling quantiles
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "pool_wait", "slowest", "slowest_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.slowest = None
+        self.slowest_time = 0.0
+
+
+# set per request by the middleware; sync routes and to_thread calls see the
+# same object because the context is copied into the worker thread
+_current: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "ms": round(elapsed * 1000, 2),
+            "statement": statement,
+        }))
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += elapsed
+    if elapsed > stats.slowest_time:
+        stats.slowest_time = elapsed
+        stats.slowest = statement
+
+
+def _on_error(context):
+    # after_cursor_execute doesn't fire for a failed statement
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, elapsed: float, timed_out: bool):
+        with self._lock:
+            self.wait_time += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+
+# engine name -> (engine, PoolStats), reported by pool_metrics
+pools = {}
+
+
+def instrument_engine(engine, name: str = None, pool_stats: PoolStats = None):
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _on_error)
+    if name is not None:
+        pool_stats = pool_stats or PoolStats()
+        pools[name] = (engine, pool_stats)
+        event.listen(engine.pool, "checkout",
+                     lambda *args: pool_stats._count("checkouts"))
+        event.listen(engine.pool, "checkin",
+                     lambda *args: pool_stats._count("checkins"))
+        event.listen(engine.pool, "connect",
+                     lambda *args: pool_stats._count("connects"))
+
+
+def timed_pool(pool_class, pool_stats: PoolStats = None):
+    """
+    pool_class with the time spent waiting for a connection added to the
+    current request's stats and to pool_stats (the pool events only fire
+    once a connection is handed out).
+    """
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            timed_out = False
+            try:
+                return super()._do_get()
+            except PoolTimeout:
+                timed_out = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                stats = _current.get()
+                if stats is not None:
+                    stats.pool_wait += elapsed
+                if pool_stats is not None:
+                    pool_stats.record_wait(elapsed, timed_out)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def exposition(families) -> str:
+    """
+    Prometheus text for [(name, type, sample lines)]. Each family's samples
+    follow its TYPE line with no other family in between, as the format
+    requires.
+    """
+    lines = []
+    for name, kind, samples in families:
+        lines.append(f"# TYPE {name} {kind}")
+        lines += samples
+    return "\n".join(lines) + "\n"
+
+
+class RouteMetrics:
+    """
+    Per-route latency histogram and query/DB-time totals (cumulative, as
+    Prometheus expects), plus quantiles over the last METRICS_WINDOW requests.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, route, status_code, duration, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            entry = self._routes.get(key)
+            if entry is None:
+                entry = self._routes[key] = {
+                    "count": 0, "sum": 0.0, "errors": 0,
+                    "buckets": [0] * len(LATENCY_BUCKETS_MS),
+                    "queries": 0, "db_time": 0.0, "pool_wait": 0.0,
+                    "recent": deque(maxlen=self.window),
+                }
+            entry["count"] += 1
+            entry["sum"] += duration
+            if status_code >= 500:
+                entry["errors"] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration * 1000 <= bound:
+                    entry["buckets"][i] += 1
+            entry["queries"] += stats.queries
+            entry["db_time"] += stats.db_time
+            entry["pool_wait"] += stats.pool_wait
+            entry["recent"].append(duration)
+
+    def prometheus(self) -> str:
+        with self._lock:
+            routes = {key: dict(entry, recent=sorted(entry["recent"]))
+                      for key, entry in self._routes.items()}
+        histogram, summary, errors, queries, db_time, pool_wait = [], [], [], [], [], []
+        for (method, route), entry in sorted(routes.items()):
+            labels = f'method="{method}",route="{route}"'
+            for bound, count in zip(LATENCY_BUCKETS_MS, entry["buckets"]):
+                histogram.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound / 1000}"}} {count}')
+            histogram.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+            histogram.append(f'http_request_duration_seconds_sum{{{labels}}} {entry["sum"]}')
+            histogram.append(f'http_request_duration_seconds_count{{{labels}}} {entry["count"]}')
+            recent = entry["recent"]
+            for q in QUANTILES:
+                value = recent[min(len(recent) - 1, int(q * len(recent)))]
+                summary.append(
+                    f'http_request_duration_recent_seconds{{{labels},quantile="{q}"}} {value}')
+            summary.append(f'http_request_duration_recent_seconds_sum{{{labels}}} {sum(recent)}')
+            summary.append(f'http_request_duration_recent_seconds_count{{{labels}}} {len(recent)}')
+            errors.append(f'http_request_errors_total{{{labels}}} {entry["errors"]}')
+            queries.append(f'db_queries_total{{{labels}}} {entry["queries"]}')
+            db_time.append(f'db_time_seconds_total{{{labels}}} {entry["db_time"]}')
+            pool_wait.append(f'db_pool_wait_seconds_total{{{labels}}} {entry["pool_wait"]}')
+        return exposition([
+            ("http_request_duration_seconds", "histogram", histogram),
+            ("http_request_duration_recent_seconds", "summary", summary),
+            ("http_request_errors_total", "counter", errors),
+            ("db_queries_total", "counter", queries),
+            ("db_time_seconds_total", "counter", db_time),
+            ("db_pool_wait_seconds_total", "counter", pool_wait),
+        ])
+
+
+route_metrics = RouteMetrics()
+
+
+def cache_metrics(caches) -> str:
+    """Prometheus lines for {name: CacheStats}."""
+    lines = ["# TYPE cache_events_total counter"]
+    for name, stats in caches.items():
+        for kind, value in stats.as_dict().items():
+            if kind == "hit_rate":
+                continue
+            lines.append(f'cache_events_total{{cache="{name}",event="{kind}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def pool_metrics() -> str:
+    families = [
+        ("db_pool_checkouts_total", "counter", []),
+        ("db_pool_connects_total", "counter", []),
+        ("db_pool_timeouts_total", "counter", []),
+        ("db_pool_wait_seconds", "counter", []),
+        ("db_pool_max_wait_seconds", "gauge", []),
+        ("db_pool_checked_out", "gauge", []),
+        ("db_pool_overflow", "gauge", []),
+        ("db_pool_size", "gauge", []),
+    ]
+    samples = {name: lines for name, _, lines in families}
+    for name, (engine, stats) in sorted(pools.items()):
+        label = f'engine="{name}"'
+        values = {
+            "db_pool_checkouts_total": stats.checkouts,
+            "db_pool_connects_total": stats.connects,
+            "db_pool_timeouts_total": stats.timeouts,
+            "db_pool_wait_seconds": stats.wait_time,
+            "db_pool_max_wait_seconds": stats.max_wait,
+            "db_pool_checked_out": stats.checkouts - stats.checkins,
+        }
+        # only QueuePool-style pools have a size and overflow (not NullPool)
+        if hasattr(engine.pool, "overflow"):
+            values["db_pool_overflow"] = max(0, engine.pool.overflow())
+            values["db_pool_size"] = engine.pool.size()
+        for metric, value in values.items():
+            samples[metric].append(f"{metric}{{{label}}} {value}")
+    return exposition(families)
+
+
+async def instrument(request, call_next):
+    """
+    HTTP middleware: times the request, collects its DB stats, adds a
+    Server-Timing header, logs a structured line and feeds route_metrics.
+    """
+    stats = RequestStats()
+    token = _current.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        # the 500 is rendered outside this middleware, so count it here
+        _record(request, 500, time.perf_counter() - started, stats)
+        raise
+    finally:
+        _current.reset(token)
+    duration = time.perf_counter() - started
+    _record(request, response.status_code, duration, stats)
+
+    response.headers["Server-Timing"] = (
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+        f'pool;dur={stats.pool_wait * 1000:.2f}, '
+        f'app;dur={duration * 1000:.2f}')
+    return response
+
+
+def _record(request, status_code, duration, stats: RequestStats):
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    route_metrics.observe(
+        request.method, route_path, status_code, duration, stats)
+    logger.info(json.dumps({
+        "event": "request",
+        "method": request.method,
+        "route": route_path,
+        "status": status_code,
+        "ms": round(duration * 1000, 2),
+        "queries": stats.queries,
+        "db_ms": round(stats.db_time * 1000, 2),
+        "pool_wait_ms": round(stats.pool_wait * 1000, 2),
+        "slowest_ms": round(stats.slowest_time * 1000, 2),
+        "slowest": stats.slowest,
+    }))
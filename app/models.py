@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, Numeric, Boolean, ForeignKey, DateTime, Float, Index, DDL, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -80,6 +80,16 @@ class Products(Base):
         onupdate=func.now())
     is_active = Column(Boolean, default=True)
 
+    # rating summary, kept in step with Reviews by crud.create_review
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_avg = Column(Numeric(3, 2), nullable=False, default=0, server_default="0")
+    rating_1_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     category = relationship("Categories", back_populates="products")
     reviews = relationship(
         "Reviews",
@@ -94,11 +104,51 @@ class Products(Base):
         back_populates="product",
         cascade="all, delete-orphan")
 
+    @property
+    def rating_histogram(self):
+        return {
+            rating: getattr(self, f"rating_{rating}_count") or 0
+            for rating in range(1, 6)
+        }
+
+    # keyset pagination indexes for the catalog (see crud.list_products)
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_created_at_id",
+              "category_id", "created_at", "id"),
+        Index("ix_products_category_price_id", "category_id", "price", "id"),
+        Index("ix_products_brand_created_at_id", "brand", "created_at", "id"),
+        Index("ix_products_brand_price_id", "brand", "price", "id"),
+        Index("ix_products_rating_avg_id", "rating_avg", "id"),
+        Index("ix_products_review_count_id", "review_count", "id"),
+        Index("ix_products_category_rating_avg_id",
+              "category_id", "rating_avg", "id"),
+        Index("ix_products_category_review_count_id",
+              "category_id", "review_count", "id"),
+        Index("ix_products_brand_rating_avg_id", "brand", "rating_avg", "id"),
+        Index("ix_products_brand_review_count_id", "brand", "review_count", "id"),
+        # full-text and trigram search (Postgres only, see app/search.py)
+        Index("ix_products_search_vector",
+              text("to_tsvector('english', coalesce(name, '') || ' ' || "
+                   "coalesce(description, '') || ' ' || coalesce(brand, ''))"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_products_name_trgm", "name",
+              postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+
+event.listen(
+    Products.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
 
 class Addresses(Base):
     __tablename__ = "addresses"
     address_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     street = Column(String, nullable=True)
     city = Column(String, nullable=True)
     state = Column(String, nullable=True)
@@ -113,7 +163,7 @@ class Addresses(Base):
 class Orders(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
 
     # Added columns so order metadata persists
     total_amount = Column(Numeric, default=0)
@@ -128,12 +178,22 @@ class Orders(Base):
     payment = relationship("Payments", back_populates="order", uselist=False)
     shipping = relationship("Shipping", back_populates="order", uselist=False)
 
+    __table_args__ = (
+        # the shipping queue only ever reads paid orders; status leads so
+        # the planner prefers this over ix_orders_status_created_at
+        Index("ix_orders_ready_to_ship", "status", "id",
+              postgresql_where=text("status = 'paid'"),
+              sqlite_where=text("status = 'paid'")),
+        # admin export filters
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer)
     price = Column(Float)
 
@@ -144,7 +204,9 @@ class OrderItem(Base):
 class Cart(Base):
     __tablename__ = "cart"
     cart_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # one cart per user
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False,
+                     unique=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("Users", back_populates="cart")
@@ -158,17 +220,24 @@ class Cart_Items(Base):
     __tablename__ = "cart_items"
     cart_item_id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(Integer, ForeignKey("cart.cart_id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False,
+                        index=True)
     quantity = Column(Integer, default=1)
 
     cart = relationship("Cart", back_populates="cart_items")
     product = relationship("Products", back_populates="cart_items")
 
+    # one line per product per cart; also serves lookups by cart_id
+    __table_args__ = (
+        Index("uq_cart_items_cart_id_product_id",
+              "cart_id", "product_id", unique=True),
+    )
+
 
 class Payments(Base):
     __tablename__ = "payments"
     payment_id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True, index=True)
     payment_method = Column(String, nullable=True)
     amount = Column(Numeric, nullable=True)
     status = Column(String, nullable=True)
@@ -181,7 +250,7 @@ class Payments(Base):
 class Reviews(Base):
     __tablename__ = "reviews"
     review_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     rating = Column(Integer, nullable=False)
     comment = Column(String, nullable=True)
@@ -190,15 +259,30 @@ class Reviews(Base):
     user = relationship("Users", back_populates="reviews")
     product = relationship("Products", back_populates="reviews")
 
+    # newest-first paginated listing per product; also covers product_id
+    __table_args__ = (
+        Index("ix_reviews_product_id_review_id", "product_id", "review_id"),
+    )
+
 
 class Shipping(Base):
     __tablename__ = "shipping"
     shipment_id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True, index=True)
     courier_name = Column(String, nullable=True)
     tracking_number = Column(String, nullable=True)
     status = Column(String, nullable=True)
     estimated_delivery = Column(DateTime, nullable=True)
-    delivered_at = Column(DateTime, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
 
     order = relationship("Orders", back_populates="shipping")
+
+
+# write counters behind the ETags when Redis is not configured (see
+# http_cache.TableVersions); one row per table name
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # time.time() of the last bump, for the replica lag window
+    changed_at = Column(Float, nullable=False, default=0)
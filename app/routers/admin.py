@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from .. import crud, models, utils
+from ..metrics import cache_metrics, pool_metrics, route_metrics
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics(admin: models.Users = Depends(utils.get_current_admin_user)):
+    # Prometheus text exposition format
+    return PlainTextResponse(
+        route_metrics.prometheus() + pool_metrics() + cache_metrics({
+            "product": crud.product_cache.stats,
+            "principal": utils.principal_cache.stats,
+        }),
+        media_type="text/plain; version=0.0.4")
@@ -1,34 +1,58 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import UserCreate  # ✅ Correct import
-from app import crud, utils
-from app.database import get_db
+from app import async_crud, utils
+from app.hashing import HashingPoolFull, hash_password_async, verify_password_async
+from app.database import get_async_db
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent sign-ins, please retry",
+        headers={"Retry-After": "1"})
+
+
 @router.post("/signup", summary="Create a new user")
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = crud.get_user_by_email(db, user.email)
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await async_crud.get_user_by_email(db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = utils.hash_password(user.password)
-    new_user = crud.create_user(db=db, user=user, hashed_password=hashed_pw)
+    try:
+        hashed_pw = await hash_password_async(user.password)
+    except HashingPoolFull:
+        raise _busy()
+    new_user = await async_crud.create_user(
+        db=db, user=user, hashed_password=hashed_pw)
     return {"message": "User created successfully", "email": new_user.email}
 
 
 @router.post("/login", summary="User Login")
-def login(
+async def login(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, form_data.username)
-    if not user or not utils.verify_password(
-            form_data.password, user.password_hash):
+        db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_email(db, form_data.username)
+    if not user:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid username or password")
+    try:
+        ok, new_hash = await verify_password_async(
+            form_data.password, user.password_hash)
+    except HashingPoolFull:
+        raise _busy()
+    if not ok:
         raise HTTPException(
             status_code=401,
             detail="Invalid username or password")
+    if new_hash:
+        # hashed with older Argon2 parameters, upgrade it transparently
+        user.password_hash = new_hash
+        await db.commit()
 
-    token = utils.create_access_token({"sub": str(user.id)})
+    token = utils.create_access_token({"sub": str(user.id), "role": user.role})
     return {"access_token": token, "token_type": "bearer"}
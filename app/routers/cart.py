@@ -28,11 +28,7 @@ def get_cart(
     db: Session = Depends(get_db),
     user: models.Users = Depends(
         utils.get_current_user)):
-    cart = crud.get_or_create_cart_for_user(db, user)
-    items = crud.list_cart_items(db, user)
-    cart.cart_items = items
-    cart = crud.get_or_create_cart_for_user(db, user)
-    return cart
+    return crud.get_cart_with_items(db, user)
 
 
 @router.delete("/items/{cart_item_id}")
@@ -44,4 +40,4 @@ def remove_item(
     ok = crud.remove_item_from_cart(db, user, cart_item_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Item not found")
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
\ No newline at end of file
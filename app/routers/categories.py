@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app import crud, schemas, models
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db, async_read_db_for
+from app.category_snapshot import VERSION_KEY, category_snapshot
+from app import crud, async_crud, schemas, models, http_cache
 from app.utils import get_current_admin_user
-from app import crud, schemas, database
 router = APIRouter(prefix="/categories")
 
 
@@ -25,25 +26,49 @@ def create_category(payload: schemas.CategoryCreate,
     db.add(category)
     db.commit()
     db.refresh(category)
+    http_cache.versions.bump("categories")
+    category_snapshot.refresh(db, [category.category_id])
     return category  # Make sure this exists in crud.py
 
 # Get all categories
 
 
 @router.get("/categories/",
-            response_model=list[schemas.CategoryOut],
+            response_model=list[schemas.CategorySummary],
             tags=["Categories"])
-def get_categories(db: Session = Depends(database.get_db)):
-    return crud.get_all_categories(db)  # <-- Use the correct function name
+async def get_categories(request: Request,
+                         response: Response,
+                         db: AsyncSession = Depends(get_async_db)):
+    # served from the in-memory snapshot; the session (primary, so a rebuild
+    # never sees replica lag) is only used when the snapshot is out of date
+    etag = http_cache.make_etag(
+        "category-tree", http_cache.versions.get(VERSION_KEY))
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
+    version, items = await db.run_sync(category_snapshot.items)
+    http_cache.apply(response, http_cache.make_etag("category-tree", version))
+    return items
 
 
 @router.get("/{category_id}",
             response_model=schemas.CategoryOut,
             tags=["Categories"])
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = crud.get_category_by_id(db, category_id)
+async def get_category(
+        category_id: int,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(async_read_db_for("categories"))):
+    # categories have no updated_at, so the table version stands in for it
+    etag = http_cache.make_etag(
+        "category", category_id, http_cache.versions.get("categories"))
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
+    category = await async_crud.get_category_by_id(db, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    http_cache.apply(response, etag)
     return category
 
 
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .. import schemas, crud, utils, models
-from ..database import get_db
+from .. import schemas, crud, async_crud, utils, models, fast_json
+from ..database import get_db, get_async_read_db
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -55,11 +56,15 @@ def buy_now(
 
 
 @router.get("/", response_model=List[schemas.OrderOut])
-def list_user_orders(
-    db: Session = Depends(get_db),
+async def list_user_orders(
+    # the user's own checkout makes them stick to the primary for a while
+    db: AsyncSession = Depends(get_async_read_db),
     user: models.Users = Depends(
         utils.get_current_user)):
-    return crud.get_orders_for_user(db, user)
+    if fast_json.FAST_JSON:
+        return fast_json.json_response(fast_json.rows(
+            await async_crud.get_orders_for_user(db, user, as_rows=True)))
+    return await async_crud.get_orders_for_user(db, user)
 
 
 @router.get("/{order_id}", response_model=schemas.OrderOut)
@@ -76,4 +81,4 @@ def get_order(
     # allow access only if owner or admin
     if order.user_id != user.id and user.role != "admin":
         raise HTTPException(status_code=403, detail="Not permitted")
-    return order
\ No newline at end of file
+    return order
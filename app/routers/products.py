@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app import crud, schemas, database, models
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, async_crud, schemas, database, models, fast_json, http_cache, bulk
 from ..utils import get_current_admin_user
 
 router = APIRouter(prefix="/products")
@@ -13,21 +18,114 @@ def create_product(payload: schemas.ProductCreate,
                    admin: models.Users = Depends(get_current_admin_user)):
     return crud.create_product(db, payload)
 
+
+@router.post("/import", tags=["Products (Only admin)"])
+def import_products(file: UploadFile = File(...),
+                    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+                    db: Session = Depends(database.get_db),
+                    admin: models.Users = Depends(get_current_admin_user)):
+    fmt = format or bulk.format_from_filename(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400, detail="Pass format=csv|jsonl or a .csv/.jsonl file")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        return bulk.import_products(db, bulk.read_rows(stream, fmt))
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/export", tags=["Products (Only admin)"])
+def export_products(format: str = Query("jsonl", pattern="^(csv|jsonl)$"),
+                    admin: models.Users = Depends(get_current_admin_user)):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        bulk.export_products(database.SessionLocal, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=products.{format}"})
+
 @router.get("/products/",
+            response_model=schemas.ProductPage,
+            tags=["Products"])
+def get_products(request: Request,
+                 response: Response,
+                 category_id: Optional[int] = None,
+                 brand: Optional[str] = None,
+                 min_price: Optional[float] = Query(None, ge=0),
+                 max_price: Optional[float] = Query(None, ge=0),
+                 is_active: Optional[bool] = None,
+                 in_stock: Optional[bool] = None,
+                 sort: str = Query("newest", pattern="^(newest|price_asc|price_desc|rating|most_reviewed)$"),
+                 cursor: Optional[str] = None,
+                 limit: int = Query(20, ge=1, le=100),
+                 db: Session = Depends(database.read_db_for("products"))):
+    # the URL carries the filters, so the table version is enough here
+    etag = http_cache.make_etag(
+        "products", http_cache.versions.get("products"))
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
+    try:
+        products, next_cursor = crud.list_products(
+            db,
+            category_id=category_id,
+            brand=brand,
+            min_price=min_price,
+            max_price=max_price,
+            is_active=is_active,
+            in_stock=in_stock,
+            sort=sort,
+            cursor=cursor,
+            limit=limit,
+            as_rows=fast_json.FAST_JSON)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fast_json.FAST_JSON:
+        return http_cache.apply(fast_json.json_response({
+            "items": [fast_json.product_row(row) for row in products],
+            "next_cursor": next_cursor,
+        }), etag)
+    http_cache.apply(response, etag)
+    return {"items": products, "next_cursor": next_cursor}
+
+@router.get("/search",
             response_model=list[schemas.ProductOut],
             tags=["Products"])
-def get_products(db: Session = Depends(database.get_db)):
-    return crud.list_products(db)
+def search_products(q: str = Query(..., min_length=1, max_length=200),
+                    limit: int = Query(20, ge=1, le=100),
+                    offset: int = Query(0, ge=0, le=10000),
+                    db: Session = Depends(database.get_db)):
+    return crud.search_products(db, q, limit=limit, offset=offset)
+
+@router.get("/cache/stats", tags=["Products (Only admin)"])
+def product_cache_stats(admin: models.Users = Depends(get_current_admin_user)):
+    return crud.product_cache.stats.as_dict()
 
 @router.get("/products/{product_id}",
             response_model=schemas.ProductOut,
             tags=["Products"])
-def get_product(product_id: int, db: Session = Depends(database.get_db)):
-    product = crud.get_product(db, product_id)
+async def get_product(
+        product_id: int,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(database.get_async_db)):
+    # served from the product cache when warm, so a 304 usually costs no query
+    product = await async_crud.get_product(db, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found")
+    # updated_at alone has one-second resolution on SQLite, and stock and
+    # rating changes go through UPDATEs that do not touch it; every product
+    # write bumps the products version
+    etag = http_cache.make_etag(
+        "product", product_id,
+        http_cache.versions.get("products"),
+        http_cache.versions.get("categories"))
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
+    http_cache.apply(response, etag)
     return product
 
 
@@ -59,4 +157,4 @@ def delete_product(product_id: int,
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found")
-    return
\ No newline at end of file
+    return
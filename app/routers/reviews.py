@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .. import schemas, crud, utils, models
-from ..database import get_db
+from .. import schemas, crud, async_crud, utils, models, fast_json, http_cache
+from ..database import get_db, async_read_db_for
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
@@ -22,13 +23,26 @@ def add_review(
 
 
 @router.get("/product/{product_id}", response_model=List[schemas.ReviewOut])
-def get_reviews_for_product(product_id: int, db: Session = Depends(get_db)):
-    reviews = (
-        db.query(models.Reviews, models.Users.first_name)
-          .join(models.Users, models.Reviews.user_id == models.Users.id)
-          .filter(models.Reviews.product_id == product_id)
-          .all()
-    )
+async def get_reviews_for_product(
+        product_id: int,
+        request: Request,
+        response: Response,
+        before: Optional[int] = None,
+        limit: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(async_read_db_for("reviews"))):
+    etag = http_cache.make_etag(
+        "reviews", product_id, http_cache.versions.get("reviews"))
+    cached = http_cache.not_modified(request, etag)
+    if cached:
+        return cached
+    if fast_json.FAST_JSON:
+        return http_cache.apply(fast_json.json_response(fast_json.rows(
+            await async_crud.get_reviews_for_product(
+                db, product_id, as_rows=True,
+                before=before, limit=limit))), etag)
+    http_cache.apply(response, etag)
+    reviews = await async_crud.get_reviews_for_product(
+        db, product_id, before=before, limit=limit)
 
     return [
         {
@@ -39,4 +53,4 @@ def get_reviews_for_product(product_id: int, db: Session = Depends(get_db)):
             "product_id": review.product_id
         }
         for review, name in reviews
-    ]
\ No newline at end of file
+    ]
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from sqlalchemy.orm import Session
 
-from .. import schemas, crud, utils, models
-from ..database import get_db
+from .. import schemas, crud, utils, models, fast_json, bulk
+from ..database import get_db, SessionLocal
 
 router = APIRouter(prefix="/shipping", tags=["Shipping (Only Admin)"])
 
@@ -42,10 +44,35 @@ def create_shipping(
     return ship
 
 
-@router.get("/", response_model=List[schemas.OrderOut])
+@router.get("/", response_model=schemas.OrderPage)
 def list_shippable_orders(
+    after: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
     admin: models.Users = Depends(
         utils.get_current_admin_user)):
-    # admins can list orders for shipping
-    return db.query(models.Orders).all()
+    # paid orders waiting to ship, oldest first; pass next_cursor as after
+    orders, next_cursor = crud.list_ready_to_ship(
+        db, after=after, limit=limit, as_rows=fast_json.FAST_JSON)
+    if fast_json.FAST_JSON:
+        return fast_json.json_response(
+            {"items": fast_json.rows(orders), "next_cursor": next_cursor})
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/orders/export")
+def export_orders(
+    format: str = Query("jsonl", pattern="^(csv|jsonl)$"),
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    admin: models.Users = Depends(
+        utils.get_current_admin_user)):
+    # streamed, so memory stays flat however many orders match
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        bulk.export_orders(
+            SessionLocal, format, status=status,
+            created_from=created_from, created_to=created_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=orders.{format}"})
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
-from .. import schemas, models, utils
+from .. import schemas, models, utils, crud, fast_json, http_cache
 from ..database import get_db
 
 router = APIRouter(prefix="/users")
@@ -35,6 +35,9 @@ def update_user(user_id: int, payload: schemas.UserCreate,
     user.last_name = payload.last_name
     user.phone_number = payload.phone_number
     db.commit()
+    utils.invalidate_principal(user_id)
+    # reviews are listed with the author's first name
+    http_cache.versions.bump("reviews")
     db.refresh(user)
     return user
 
@@ -48,8 +51,11 @@ def delete_user(user_id: int,
     user = db.query(models.Users).filter(models.Users.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    crud.remove_user_reviews_from_ratings(db, user_id)
     db.delete(user)
     db.commit()
+    utils.invalidate_principal(user_id)
+    http_cache.versions.bump("reviews")
     return {"ok": True}
 
 
@@ -60,5 +66,8 @@ def delete_user(user_id: int,
 def list_users(skip: int = 0, limit: int = 50,
                db: Session = Depends(get_db),
                admin: models.Users = Depends(utils.get_current_admin_user)):
+    if fast_json.FAST_JSON:
+        return fast_json.json_response(fast_json.rows(
+            db.query(*crud.USER_ROW_COLUMNS).offset(skip).limit(limit).all()))
     users = db.query(models.Users).offset(skip).limit(limit).all()
     return users
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 # --- Auth / User ---
@@ -57,6 +57,13 @@ class CategoryOut(BaseModel):
     }
 
 
+class CategorySummary(CategoryOut):
+    # active products only
+    product_count: int = 0
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+
 class ProductCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -79,11 +86,19 @@ class ProductOut(BaseModel):
     category: Optional[CategoryOut]
     is_active: bool
     created_at: Optional[datetime]
+    review_count: int = 0
+    rating_avg: float = 0
+    rating_histogram: Dict[int, int] = {}
 
     model_config = {
         "from_attributes": True
     }
 
+
+class ProductPage(BaseModel):
+    items: List[ProductOut]
+    next_cursor: Optional[str] = None
+
 class ProductBase(BaseModel):
     description: str
     price: float
@@ -195,6 +210,11 @@ class OrderOut(BaseModel):
     }
 
 
+class OrderPage(BaseModel):
+    items: List[OrderOut]
+    next_cursor: Optional[int] = None
+
+
 class CartCheckout(BaseModel):
     shipping_address_id: int
     billing_address_id: Optional[int] = None
@@ -227,4 +247,13 @@ class ReviewOut(ReviewCreate):
     review_id: int
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+
+# --- Agent ---
+
+
+class AgentBatchRequest(BaseModel):
+    # one shopping-list style query ("3 pens, a notebook and 2 footballs")
+    # or several single-item queries
+    queries: List[str] = Field(..., min_length=1, max_length=50)
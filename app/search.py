@@ -0,0 +1,162 @@
+import re
+import threading
+from collections import defaultdict
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+from app.models import Products
+
+# Full-text document for a product. Kept as literal SQL so the query
+# expression is textually identical to the GIN expression index created in
+# alembic/versions/0003_product_search_indexes.py (and on Products) and the
+# planner can use it.
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('english', coalesce(name, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(brand, ''))"
+)
+
+# minimum trigram similarity for a typo to count as a match
+FUZZY_THRESHOLD = 0.3
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    return _WORD.findall((text or "").lower())
+
+
+def trigrams(word: str):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def postgres_search_ids(db: Session, q: str, limit: int, offset: int):
+    """
+    Ranked product ids using the tsvector GIN index for word matches and
+    the pg_trgm index on name for misspellings.
+    """
+    vector = literal_column(SEARCH_VECTOR_SQL)
+    tsquery = func.websearch_to_tsquery("english", q)
+    rank = func.ts_rank_cd(vector, tsquery) + func.similarity(Products.name, q)
+
+    rows = (
+        db.query(Products.id)
+        .filter(vector.op("@@")(tsquery) | Products.name.op("%")(q))
+        .order_by(rank.desc(), Products.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [row.id for row in rows]
+
+
+class ProductSearchIndex:
+    """
+    In-process inverted index over product name/description/brand, used when
+    the database is not Postgres (SQLite dev/test setups).
+
+    Built lazily from the products table on first search and kept current by
+    the product write functions in crud.py. Each worker process holds its own
+    copy, so writes made by other processes are only seen after rebuild().
+    """
+
+    # a hit in the product name counts more than one in description/brand
+    NAME_WEIGHT = 2.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings = defaultdict(dict)   # token -> {product_id: weight}
+        self._grams = defaultdict(set)       # trigram -> tokens
+        self._docs = {}                      # product_id -> {token: weight}
+
+    def _add(self, product_id: int, name: str, description: str, brand: str):
+        doc = {}
+        for token in tokenize(description) + tokenize(brand):
+            doc[token] = max(doc.get(token, 0.0), 1.0)
+        for token in tokenize(name):
+            doc[token] = self.NAME_WEIGHT
+        for token, weight in doc.items():
+            if token not in self._postings:
+                for gram in trigrams(token):
+                    self._grams[gram].add(token)
+            self._postings[token][product_id] = weight
+        self._docs[product_id] = doc
+
+    def _remove(self, product_id: int):
+        for token in self._docs.pop(product_id, {}):
+            postings = self._postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    self._grams[gram].discard(token)
+
+    def rebuild(self, db: Session):
+        rows = db.query(
+            Products.id,
+            Products.name,
+            Products.description,
+            Products.brand).yield_per(1000)
+        with self._lock:
+            self._postings.clear()
+            self._grams.clear()
+            self._docs.clear()
+            for row in rows:
+                self._add(row.id, row.name, row.description, row.brand)
+            self._built = True
+
+    def upsert(self, product):
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(product.id)
+            self._add(product.id, product.name, product.description, product.brand)
+
+    def remove(self, product_id: int):
+        with self._lock:
+            if self._built:
+                self._remove(product_id)
+
+    def _expand(self, token: str):
+        """Exact token plus indexed tokens within FUZZY_THRESHOLD of it."""
+        if token in self._postings:
+            return {token: 1.0}
+        candidates = set()
+        for gram in trigrams(token):
+            candidates |= self._grams.get(gram, set())
+        matches = {}
+        for candidate in candidates:
+            score = similarity(token, candidate)
+            if score >= FUZZY_THRESHOLD:
+                matches[candidate] = score
+        return matches
+
+    def search(self, db: Session, q: str, limit: int, offset: int):
+        if not self._built:
+            self.rebuild(db)
+        scores = defaultdict(float)
+        with self._lock:
+            for token in tokenize(q):
+                for match, closeness in self._expand(token).items():
+                    for product_id, weight in self._postings[match].items():
+                        scores[product_id] += closeness * weight
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], pid))
+        return ranked[offset:offset + limit]
+
+
+product_index = ProductSearchIndex()
+
+
+def search_product_ids(db: Session, q: str, limit: int = 20, offset: int = 0):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgres_search_ids(db, q, limit, offset)
+    return product_index.search(db, q, limit, offset)
@@ -1,3 +1,5 @@
+import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,21 +8,8 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
-
-ph = PasswordHasher()
-
-
-def hash_password(password: str) -> str:
-    return ph.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    try:
-        return ph.verify(hashed_password, plain_password)
-    except VerifyMismatchError:
-        return False
+from app.cache import build_cache, row_snapshot, detached_from_snapshot
+from app.hashing import hash_password, verify_password  # noqa: F401
 
 
 SECRET_KEY = "secret_key_h"
@@ -33,9 +22,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + \
-        timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})  # ✅ keep sub as user_id
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})  # ✅ keep sub as user_id
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -59,29 +48,73 @@ def get_current_user_optional(
     except HTTPException:
         return None
 
-def verify_token(db: Session, token: str) -> models.Users:
+# Authenticated users by id, so a valid token does not cost a SELECT on
+# every request. Entries never outlive the token that cached them and are
+# dropped by invalidate_principal() whenever a user row changes.
+principal_cache = build_cache(
+    "principal",
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")))
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.delete(int(user_id))
+
+
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise HTTPException(
                 status_code=401,
                 detail="Invalid token payload")
     except JWTError:
         raise HTTPException(status_code=401,
                             detail="Could not validate credentials")
+    return payload
+
+
+def user_from_payload(db: Session, payload: dict) -> models.Users:
+    user_id = int(payload["sub"])
+    # lets app.database route this user's reads to the primary after a write
+    db.info["user_id"] = user_id
+    snapshot = principal_cache.get(user_id)
+    if snapshot is not None:
+        return db.merge(
+            detached_from_snapshot(models.Users, snapshot), load=False)
 
     user = db.query(
         models.Users).filter(
-        models.Users.id == int(user_id)).first()
+        models.Users.id == user_id).first()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
 
+    principal_cache.set(
+        user_id,
+        row_snapshot(user, exclude=("password_hash",)),
+        ttl=min(principal_cache.ttl, payload["exp"] - time.time()))
     return user
 
 
+def verify_token(db: Session, token: str) -> models.Users:
+    return user_from_payload(db, decode_token(token))
+
+
 def get_current_admin_user(
-        current_user: models.Users = Depends(get_current_user)):
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> models.Users:
+    payload = decode_token(token)
+    # tokens carry the role they were issued with, so non-admins are turned
+    # away without touching the database
+    role = payload.get("role")
+    if role is not None and role.lower() != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    # still confirm the current role, in case it was revoked after issue
+    current_user = user_from_payload(db, payload)
     if current_user.role.lower() != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
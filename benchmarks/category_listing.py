@@ -0,0 +1,43 @@
+"""
+Compares the category listing served from the in-memory snapshot with
+building the same data (categories plus active-product count and price
+range) with a query per request:
+
+    python -m benchmarks.category_listing --iterations 1000
+"""
+import argparse
+import time
+
+from app.category_snapshot import CategorySnapshot
+from app.database import SessionLocal
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3),
+        "per_s": round(iterations / sum(samples), 1),
+    }
+
+
+def main(iterations: int):
+    snapshot = CategorySnapshot()
+    with SessionLocal() as db:
+        query_path = timed(lambda: snapshot._aggregate(db), iterations)
+        snapshot.items(db)  # build once
+        snapshot_path = timed(lambda: snapshot.items(db), iterations)
+    print(f"query per request: {query_path}")
+    print(f"snapshot:          {snapshot_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.iterations)
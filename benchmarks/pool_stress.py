@@ -0,0 +1,65 @@
+"""
+Drives more concurrent connection holders than the pool allows, to show
+behavior at pool exhaustion: how long checkouts wait, how many time out, and
+how far overflow grows.
+
+    DB_POOL_SIZE=5 DB_MAX_OVERFLOW=5 DB_POOL_TIMEOUT=2 \
+        python -m benchmarks.pool_stress --workers 40 --hold 0.5
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.metrics import pools
+
+
+def hold_connection(hold: float, results, lock):
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            waited = time.perf_counter() - started
+            conn.execute(text("SELECT 1"))
+            time.sleep(hold)
+        outcome = "ok"
+    except Exception as e:
+        waited = time.perf_counter() - started
+        outcome = type(e).__name__
+    with lock:
+        results.append((outcome, waited, getattr(engine.pool, "overflow", int)()))
+
+
+def stress(workers: int, hold: float, rounds: int):
+    results = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(workers * rounds):
+            executor.submit(hold_connection, hold, results, lock)
+    elapsed = time.perf_counter() - started
+
+    waits = sorted(waited for _, waited, _ in results)
+    outcomes = {}
+    for outcome, _, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    _, stats = pools["primary"]
+    print(f"pool: {engine.pool.status()}")
+    print(f"{len(results)} checkouts by {workers} workers in {elapsed:.2f}s: {outcomes}")
+    print(f"wait p50 {waits[len(waits) // 2] * 1000:.1f}ms, "
+          f"p99 {waits[int(len(waits) * 0.99) - 1] * 1000:.1f}ms, "
+          f"max {waits[-1] * 1000:.1f}ms")
+    print(f"peak overflow {max(overflow for _, _, overflow in results)}, "
+          f"pool timeouts {stats.timeouts}, connects {stats.connects}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=40)
+    parser.add_argument("--hold", type=float, default=0.5,
+                        help="seconds each checkout keeps its connection")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    stress(args.workers, args.hold, args.rounds)
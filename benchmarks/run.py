@@ -0,0 +1,457 @@
+"""
+Runs a scripted journey against a seeded database and reports throughput,
+p50/p95/p99 per endpoint and DB query counts:
+
+    python -m benchmarks.run --journeys 500 --concurrency 8 --save results.json
+    python -m benchmarks.run --journeys 500 --compare results.json
+
+--scenario picks the journey (default shopper):
+
+    shopper       login -> browse -> add to cart -> checkout -> pay -> ship
+    reads         the async read routes: product, reviews, categories, orders
+    catalog       filtered and sorted catalog pages, following the cursors
+    search        ranked search, some of it with typos
+    login         password logins only (the Argon2 hashing pool)
+    agent         /agent/order with a mix of simple and free-form queries
+    agent-cached  /agent/order repeating a few phrasings (extraction cache)
+    agent-batch   /agent/order/batch with three items per request
+    lists         the list endpoints; run once with FAST_JSON=1 to compare
+    polling       a client re-polling the catalog and a product with
+                  If-None-Match while an admin occasionally edits a product
+
+The app builds its LLM client on import, so in-process runs need
+AGENT_FAKE_LLM=1 (or GROQ_API_KEY); the agent scenarios then use the fake.
+By default the app runs in-process (TestClient), which is what makes query
+counting possible; --url targets a running server instead (no query counts).
+Per-endpoint query counts are exact only with --concurrency 1.
+
+benchmarks/baselines/ holds one --save per scenario, taken in-process on
+SQLite seeded with `python -m benchmarks.seed --users 200 --products 5000
+--reviews 20000` and run with `--journeys 100` (lists-fast-json.json is the
+lists scenario with FAST_JSON=1). catalog-50000.json and catalog-200000.json
+repeat the catalog scenario with --products 50000 / 200000 and four reviews
+per product, to check that page latency stays flat as the table grows.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.seed import (
+    ADJECTIVES, ADMIN_EMAIL, BENCH_PASSWORD, BRANDS, NOUNS, user_email)
+
+SORTS = ["newest", "price_asc", "price_desc", "rating", "most_reviewed"]
+# the first is simple enough for the rule parser, the others need the LLM
+AGENT_PHRASES = [
+    "{quantity} {name}",
+    "please order {quantity} of the {name} for me",
+    "could you get me {quantity} {name}, thanks",
+]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+class Recorder:
+    def __init__(self, counter=None):
+        self.counter = counter
+        self.latencies = {}
+        self.queries = {}
+        self.errors = {}
+        self.bytes = {}
+        self.not_modified = {}
+        self._lock = threading.Lock()
+
+    def call(self, client, step, method, url, **kwargs):
+        before = self.counter.count if self.counter else 0
+        started = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        queries = (self.counter.count - before) if self.counter else None
+        with self._lock:
+            self.latencies.setdefault(step, []).append(elapsed)
+            if queries is not None:
+                self.queries.setdefault(step, []).append(queries)
+            self.bytes[step] = self.bytes.get(step, 0) + len(response.content)
+            if response.status_code == 304:
+                self.not_modified[step] = self.not_modified.get(step, 0) + 1
+            if response.status_code >= 400:
+                self.errors[step] = self.errors.get(step, 0) + 1
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"{step}: {response.status_code} {response.text[:200]}")
+        return response
+
+
+def login(recorder, client, email):
+    response = recorder.call(
+        client, "POST /auth/login", "POST", "/auth/login",
+        data={"username": email, "password": BENCH_PASSWORD})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def journey(recorder, client, email, admin_headers, rng):
+    headers = login(recorder, client, email)
+    page = recorder.call(
+        client, "GET /products/products/", "GET", "/products/products/",
+        params={"limit": 20, "sort": rng.choice(["newest", "price_asc", "rating"])})
+    items = page.json()["items"]
+    product_id = rng.choice(items)["id"]
+    recorder.call(
+        client, "GET /products/products/{id}", "GET",
+        f"/products/products/{product_id}")
+    recorder.call(
+        client, "GET /reviews/product/{id}", "GET",
+        f"/reviews/product/{product_id}")
+
+    for item in rng.sample(items, k=min(3, len(items))):
+        recorder.call(
+            client, "POST /cart/items", "POST", "/cart/items", headers=headers,
+            json={"product_id": item["id"], "quantity": rng.randint(1, 3)})
+    cart = recorder.call(client, "GET /cart/", "GET", "/cart/", headers=headers).json()
+    addresses = recorder.call(
+        client, "GET /addresses/", "GET", "/addresses/", headers=headers).json()
+
+    order = recorder.call(
+        client, "POST /orders/from-cart/{cart_id}", "POST",
+        f"/orders/from-cart/{cart['cart_id']}", headers=headers,
+        json={"shipping_address_id": addresses[0]["address_id"]}).json()
+    recorder.call(
+        client, "POST /payments/", "POST", "/payments/", headers=headers,
+        json={"order_id": order["id"], "payment_method": "card",
+              "amount": order["total_amount"]})
+    recorder.call(
+        client, "POST /shipping/create", "POST", "/shipping/create",
+        headers=admin_headers,
+        params={"order_id": order["id"], "courier_name": "BenchPost",
+                "tracking_number": f"BENCH-{order['id']}"})
+
+
+def browse_page(recorder, client, rng, step="GET /products/products/", **params):
+    params.setdefault("limit", 20)
+    params.setdefault("sort", rng.choice(SORTS))
+    return recorder.call(
+        client, step, "GET", "/products/products/", params=params).json()
+
+
+def reads_journey(recorder, client, email, admin_headers, rng):
+    headers = login(recorder, client, email)
+    items = browse_page(recorder, client, rng)["items"]
+    for item in rng.sample(items, k=min(3, len(items))):
+        product = recorder.call(
+            client, "GET /products/products/{id}", "GET",
+            f"/products/products/{item['id']}").json()
+        recorder.call(
+            client, "GET /reviews/product/{id}", "GET",
+            f"/reviews/product/{item['id']}")
+    recorder.call(
+        client, "GET /categories/categories/", "GET", "/categories/categories/")
+    if product.get("category"):
+        recorder.call(
+            client, "GET /categories/{id}", "GET",
+            f"/categories/{product['category']['category_id']}")
+    recorder.call(client, "GET /orders/", "GET", "/orders/", headers=headers)
+
+
+def catalog_journey(recorder, client, email, admin_headers, rng):
+    # reported per filter, since each is served by a different index
+    kind, filters = rng.choice([
+        ("unfiltered", {}),
+        ("brand", {"brand": rng.choice(BRANDS)}),
+        ("price range", {"min_price": 50, "max_price": 150}),
+        ("in stock", {"in_stock": True}),
+        ("category", {"category_id": rng.randint(1, 50)}),
+    ])
+    # a cursor is only valid with the sort it came from
+    filters["sort"] = rng.choice(SORTS)
+    page = browse_page(
+        recorder, client, rng, f"GET /products/products/ ({kind})", **filters)
+    for _ in range(3):
+        if not page["next_cursor"]:
+            break
+        page = browse_page(
+            recorder, client, rng, f"GET /products/products/ ({kind}, next page)",
+            cursor=page["next_cursor"], **filters)
+
+
+def search_journey(recorder, client, email, admin_headers, rng):
+    for _ in range(3):
+        query = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        step = "GET /products/search"
+        if rng.random() < 0.3:
+            # drop a letter: only the fuzzy tier can match it
+            cut = rng.randrange(len(query))
+            query = query[:cut] + query[cut + 1:]
+            step += " (typo)"
+        recorder.call(
+            client, step, "GET", "/products/search", params={"q": query})
+
+
+def login_journey(recorder, client, email, admin_headers, rng):
+    login(recorder, client, email)
+
+
+def _agent_query(rng, items):
+    return rng.choice(AGENT_PHRASES).format(
+        quantity=rng.randint(1, 3), name=rng.choice(items)["name"])
+
+
+def agent_journey(recorder, client, email, admin_headers, rng):
+    headers = login(recorder, client, email)
+    items = browse_page(recorder, client, rng)["items"]
+    recorder.call(
+        client, "POST /agent/order", "POST", "/agent/order",
+        params={"query": _agent_query(rng, items)}, headers=headers)
+
+
+def agent_cached_journey(recorder, client, email, admin_headers, rng):
+    headers = login(recorder, client, email)
+    # the same few products every time, so the phrasings repeat
+    items = browse_page(recorder, client, rng, sort="price_asc", limit=5)["items"]
+    recorder.call(
+        client, "POST /agent/order (repeated)", "POST", "/agent/order",
+        params={"query": _agent_query(rng, items)}, headers=headers)
+
+
+def agent_batch_journey(recorder, client, email, admin_headers, rng):
+    headers = login(recorder, client, email)
+    items = browse_page(recorder, client, rng)["items"]
+    picked = rng.sample(items, k=min(3, len(items)))
+    query = ", ".join(
+        f"{rng.randint(1, 3)} {item['name']}" for item in picked)
+    recorder.call(
+        client, "POST /agent/order/batch", "POST", "/agent/order/batch",
+        json={"queries": [query]}, headers=headers)
+
+
+def lists_journey(recorder, client, email, admin_headers, rng):
+    headers = login(recorder, client, email)
+    items = browse_page(recorder, client, rng, limit=100)["items"]
+    recorder.call(
+        client, "GET /reviews/product/{id}", "GET",
+        f"/reviews/product/{rng.choice(items)['id']}", params={"limit": 100})
+    recorder.call(client, "GET /orders/", "GET", "/orders/", headers=headers)
+    recorder.call(
+        client, "GET /users/", "GET", "/users/", headers=admin_headers,
+        params={"limit": 100})
+    recorder.call(
+        client, "GET /shipping/", "GET", "/shipping/", headers=admin_headers,
+        params={"limit": 100})
+
+
+def polling_journey(recorder, client, email, admin_headers, rng):
+    sort = rng.choice(SORTS)
+    first = recorder.call(
+        client, "GET /products/products/ (full)", "GET", "/products/products/",
+        params={"limit": 20, "sort": sort})
+    product_id = rng.choice(first.json()["items"])["id"]
+    detail = recorder.call(
+        client, "GET /products/products/{id} (full)", "GET",
+        f"/products/products/{product_id}")
+    etags = {"list": first.headers.get("etag"), "detail": detail.headers.get("etag")}
+    for _ in range(4):
+        if rng.random() < 0.1:
+            # someone edits a product between polls
+            product = detail.json()
+            recorder.call(
+                client, "PUT /products/{id}", "PUT", f"/products/{product_id}",
+                headers=admin_headers, json={
+                    "description": product["description"] or "",
+                    "price": round(rng.uniform(1, 500), 2),
+                    "category_id": product["category"]["category_id"]})
+        page = recorder.call(
+            client, "GET /products/products/ (revalidate)", "GET",
+            "/products/products/", params={"limit": 20, "sort": sort},
+            headers={"If-None-Match": etags["list"]})
+        etags["list"] = page.headers.get("etag", etags["list"])
+        revalidated = recorder.call(
+            client, "GET /products/products/{id} (revalidate)", "GET",
+            f"/products/products/{product_id}",
+            headers={"If-None-Match": etags["detail"]})
+        etags["detail"] = revalidated.headers.get("etag", etags["detail"])
+        if revalidated.status_code == 200:
+            detail = revalidated
+
+
+SCENARIOS = {
+    "shopper": journey,
+    "reads": reads_journey,
+    "catalog": catalog_journey,
+    "search": search_journey,
+    "login": login_journey,
+    "agent": agent_journey,
+    "agent-cached": agent_cached_journey,
+    "agent-batch": agent_batch_journey,
+    "lists": lists_journey,
+    "polling": polling_journey,
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(recorder, scenario, journeys, failed, elapsed):
+    endpoints = {}
+    for step, latencies in recorder.latencies.items():
+        queries = recorder.queries.get(step)
+        endpoints[step] = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(step, 0),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_per_request":
+                round(sum(queries) / len(queries), 2) if queries else None,
+            "bytes_per_request": round(recorder.bytes.get(step, 0) / len(latencies)),
+            "not_modified_rate":
+                round(recorder.not_modified.get(step, 0) / len(latencies), 3),
+        }
+    requests = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "scenario": scenario,
+        "journeys": journeys,
+        "failed_journeys": failed,
+        "elapsed_s": round(elapsed, 2),
+        "journeys_per_s": round(journeys / elapsed, 2),
+        "requests_per_s": round(requests / elapsed, 2),
+        "total_queries": recorder.counter.count if recorder.counter else None,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(summary, baseline=None):
+    print(f"{summary.get('scenario', 'shopper')}: {summary['journeys']} journeys ({summary['failed_journeys']} failed) "
+          f"in {summary['elapsed_s']}s: {summary['journeys_per_s']} journeys/s, "
+          f"{summary['requests_per_s']} req/s")
+    print(f"{'endpoint':40} {'n':>6} {'err':>4} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8} {'queries':>8} {'bytes':>8} {'304s':>6}")
+    for step, stats in summary["endpoints"].items():
+        line = (f"{step:40} {stats['requests']:>6} {stats['errors']:>4} "
+                f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+                f"{stats['queries_per_request'] if stats['queries_per_request'] is not None else '-':>8} "
+                f"{stats.get('bytes_per_request', '-'):>8} {stats.get('not_modified_rate', '-'):>6}")
+        old = (baseline or {}).get("endpoints", {}).get(step)
+        if old:
+            line += f"   p95 {stats['p95_ms'] - old['p95_ms']:+.2f}ms vs baseline"
+        print(line)
+    if "extraction_cache" in summary:
+        cache = summary["extraction_cache"]
+        print(f"extraction cache: {cache['llm_calls_saved']} LLM calls saved, "
+              f"{cache['misses']} misses, hit rate {cache['hit_rate']}")
+    if baseline:
+        print(f"throughput {summary['journeys_per_s'] - baseline['journeys_per_s']:+.2f} "
+              f"journeys/s vs baseline")
+
+
+# scenarios whose summary includes the agent's extraction cache counters
+EXTRACTION_CACHE_SCENARIOS = {"agent", "agent-cached"}
+CACHE_COUNTERS = ("exact_hits", "fuzzy_hits", "misses", "llm_calls_saved")
+
+
+def extraction_cache_stats(client, admin_headers):
+    return client.get("/agent/cache/stats", headers=admin_headers).json()
+
+
+def run(journeys, concurrency, users, url=None, seed=1, scenario="shopper"):
+    journey_fn = SCENARIOS[scenario]
+    if url:
+        client_factory = lambda: httpx.Client(base_url=url, timeout=60)
+        recorder = Recorder()
+    else:
+        from fastapi.testclient import TestClient
+        from app.database import async_engine, engine
+        from app.main import app
+
+        counter = QueryCounter()
+        counter.attach(engine)
+        counter.attach(async_engine.sync_engine)
+        recorder = Recorder(counter)
+        shared = TestClient(app)
+        client_factory = lambda: shared
+
+    # no `with` on the client: exiting it would run the app's shutdown hooks
+    admin_client = client_factory()
+    admin_headers = login(recorder, admin_client, ADMIN_EMAIL)
+    if scenario in EXTRACTION_CACHE_SCENARIOS:
+        cache_before = extraction_cache_stats(admin_client, admin_headers)
+    # the admin login is setup, not part of the measured journeys
+    recorder.latencies.clear()
+    recorder.queries.clear()
+    if recorder.counter:
+        recorder.counter.count = 0
+
+    failed = 0
+    failed_lock = threading.Lock()
+
+    def worker(n):
+        nonlocal failed
+        rng = random.Random(seed * 100_000 + n)
+        client = client_factory()
+        try:
+            journey_fn(recorder, client, user_email(n % users), admin_headers, rng)
+        except Exception as e:
+            with failed_lock:
+                failed += 1
+            print(f"journey {n} failed: {e}")
+        finally:
+            if url:
+                client.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(journeys)))
+    summary = summarize(
+        recorder, scenario, journeys, failed, time.perf_counter() - started)
+    if scenario in EXTRACTION_CACHE_SCENARIOS:
+        # counters are cumulative on the server; report this run's share
+        cache_after = extraction_cache_stats(admin_client, admin_headers)
+        cache = {key: cache_after[key] - cache_before[key] for key in CACHE_COUNTERS}
+        lookups = cache["exact_hits"] + cache["fuzzy_hits"] + cache["misses"]
+        cache["hit_rate"] = round(cache["llm_calls_saved"] / lookups, 3) if lookups else 0.0
+        summary["extraction_cache"] = cache
+    if url:
+        admin_client.close()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--journeys", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000,
+                        help="number of seeded bench users to cycle through")
+    parser.add_argument("--url", help="run against a live server instead")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="shopper")
+    parser.add_argument("--save", help="write the summary as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --save")
+    args = parser.parse_args()
+
+    summary = run(args.journeys, args.concurrency, args.users, args.url,
+                  args.seed, args.scenario)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
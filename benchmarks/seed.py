@@ -0,0 +1,133 @@
+"""
+Seeds the configured database (app.database) with benchmark data:
+
+    python -m benchmarks.seed --users 1000 --products 100000 --reviews 500000
+
+Users are bench-user-<n>@example.com (plus bench-admin@example.com), all with
+password BENCH_PASSWORD, each with a default shipping address. Tables are
+created if missing; run against an empty database.
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert, select, text
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.hashing import hash_password
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_EMAIL = "bench-admin@example.com"
+BATCH_SIZE = 5000
+BRANDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli"]
+NOUNS = ["pen", "notebook", "football", "lamp", "mug", "backpack", "charger",
+         "headphones", "bottle", "keyboard", "mouse", "jacket", "shoes"]
+ADJECTIVES = ["blue", "red", "large", "small", "wireless", "steel", "classic",
+              "pro", "eco", "travel", "kids", "premium"]
+
+
+def user_email(n: int) -> str:
+    return f"bench-user-{n}@example.com"
+
+
+def _insert_batches(db, model, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.execute(insert(model), batch)
+            batch = []
+    if batch:
+        db.execute(insert(model), batch)
+    db.commit()
+
+
+def seed(users: int, categories: int, products: int, reviews: int, seed: int = 1):
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+    # one hash for everyone; argon2 per user would dominate seeding time
+    password_hash = hash_password(BENCH_PASSWORD)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        _insert_batches(db, models.Categories, (
+            {"category_name": f"Category {n}", "description": f"Bench category {n}"}
+            for n in range(categories)))
+        category_ids = db.scalars(select(models.Categories.category_id)).all()
+
+        _insert_batches(db, models.Products, (
+            {
+                "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}",
+                "description": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} for benchmarks",
+                "price": round(rng.uniform(1, 500), 2),
+                "discount_price": 0,
+                # large enough that journeys never run a product out
+                "stock_qty": 1_000_000,
+                "brand": rng.choice(BRANDS),
+                "category_id": rng.choice(category_ids),
+                "is_active": True,
+            }
+            for n in range(products)))
+        product_ids = db.scalars(select(models.Products.id)).all()
+
+        _insert_batches(db, models.Users, [
+            {"first_name": "Bench", "last_name": "Admin", "email": ADMIN_EMAIL,
+             "password_hash": password_hash, "role": "admin"}
+        ] + [
+            {"first_name": f"User{n}", "last_name": "Bench", "email": user_email(n),
+             "password_hash": password_hash, "role": "user"}
+            for n in range(users)
+        ])
+        user_ids = db.scalars(select(models.Users.id)).all()
+
+        _insert_batches(db, models.Addresses, (
+            {"user_id": user_id, "street": f"{user_id} Bench Street",
+             "city": "Benchville", "state": "BS", "country": "Benchland",
+             "postal_code": "00000", "is_default_shipping": True,
+             "is_default_billing": True}
+            for user_id in user_ids))
+
+        _insert_batches(db, models.Reviews, (
+            {"user_id": rng.choice(user_ids), "product_id": rng.choice(product_ids),
+             "rating": rng.randint(1, 5), "comment": "benchmark review"}
+            for _ in range(reviews)))
+        _refresh_rating_summaries(db)
+
+        print(f"seeded {categories} categories, {products} products, "
+              f"{len(user_ids)} users, {reviews} reviews "
+              f"in {time.perf_counter() - started:.1f}s")
+
+
+def _refresh_rating_summaries(db):
+    # same aggregates crud.create_review maintains incrementally
+    db.execute(text("""
+        UPDATE products SET
+            review_count = (SELECT count(*) FROM reviews r
+                            WHERE r.product_id = products.id),
+            rating_sum = (SELECT coalesce(sum(r.rating), 0) FROM reviews r
+                          WHERE r.product_id = products.id)
+    """))
+    for rating in range(1, 6):
+        db.execute(text(f"""
+            UPDATE products SET rating_{rating}_count = (
+                SELECT count(*) FROM reviews r
+                WHERE r.product_id = products.id AND r.rating = {rating})
+        """))
+    db.execute(text("""
+        UPDATE products SET rating_avg = round(
+            rating_sum * 1.0 / review_count, 2)
+        WHERE review_count > 0
+    """))
+    db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--reviews", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    seed(args.users, args.categories, args.products, args.reviews, args.seed)
@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+# configure before anything imports app.database
+_tmp = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("AGENT_FAKE_LLM", "1")
+os.environ.setdefault("AGENT_FAKE_LLM_LATENCY", "0")
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "8192")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, search, utils
+from app.category_snapshot import category_snapshot
+from app.database import Base, SessionLocal, engine, recent_writers
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    crud.product_cache.clear()
+    utils.principal_cache.clear()
+    recent_writers.clear()
+    search.product_index = search.ProductSearchIndex()
+    category_snapshot.version = None
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # no `with`: that would run the shutdown hook and stop the hashing pool
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user(db):
+    counter = iter(range(1, 10_000))
+
+    def make(role="user", with_address=True):
+        n = next(counter)
+        user = models.Users(
+            first_name=f"User{n}", last_name="Test",
+            email=f"user{n}-{role}@example.com",
+            password_hash="unused", role=role)
+        db.add(user)
+        db.flush()
+        if with_address:
+            db.add(models.Addresses(
+                user_id=user.id, street="1 Test St", city="Testville",
+                is_default_shipping=True))
+        db.commit()
+        token = utils.create_access_token({"sub": str(user.id), "role": role})
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return make
+
+
+@pytest.fixture
+def make_product(db):
+    def make(stock=10, price=10, category=True, **fields):
+        category_id = None
+        if category:
+            cat = models.Categories(category_name=f"Cat {stock}-{price}-{id(fields)}")
+            db.add(cat)
+            db.flush()
+            category_id = cat.category_id
+        product = models.Products(
+            name=fields.pop("name", "Widget"), price=price, discount_price=0,
+            stock_qty=stock, category_id=category_id, is_active=True, **fields)
+        db.add(product)
+        db.commit()
+        return product
+
+    return make
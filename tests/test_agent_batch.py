@@ -0,0 +1,61 @@
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import main, metrics, models
+from tests.test_cart import _queries
+
+NAMES = ["Football", "Laptop", "Notebook", "Blue Pen", "Wireless Mouse", "Desk Lamp"]
+
+
+def _statements(db, user, queries):
+    stats = metrics.RequestStats()
+    token = metrics._current.set(stats)
+    try:
+        result = asyncio.run(main.batch_agent.order(queries, user, db))
+    finally:
+        metrics._current.reset(token)
+    assert "order_id" in result, result
+    return stats.queries
+
+
+def test_single_order_query_budget(client, make_user, make_product):
+    for name in NAMES[:2]:
+        make_product(stock=100, name=name)
+    main.name_index._loaded_at = None
+    _, headers = make_user()
+    # warm up: loads the principal, the name index and the version rows
+    client.post("/agent/order", params={"query": "1 football"}, headers=headers)
+
+    commits = []
+
+    def committed(session):
+        commits.append(session)
+
+    # the request's session; the version bump runs on its own connection
+    event.listen(Session, "after_commit", committed)
+    try:
+        response = client.post("/agent/order", params={"query": "2 laptop"}, headers=headers)
+    finally:
+        event.remove(Session, "after_commit", committed)
+    assert "Order placed" in response.json()["message"]
+    # product, category, address, stock, order, line, version bump and the
+    # order echoed back; lookup and buy-now commit once
+    assert _queries(response) <= 9
+    assert len(commits) == 1
+
+
+def test_batch_order_statements_do_not_grow_per_item(db, make_user, make_product):
+    for name in NAMES:
+        make_product(stock=100, name=name)
+    main.name_index._loaded_at = None
+    user, _ = make_user()
+
+    # warm up: loads the name index
+    _statements(db, user, ["1 football"])
+    one = _statements(db, user, ["2 laptop"])
+    many = _statements(db, user, [f"2 {name.lower()}" for name in NAMES])
+
+    assert many == one
+    assert db.query(models.OrderItem).count() == 2 + len(NAMES)
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.agent.parser import MIN_CONFIDENCE, ProductNameIndex, parse_query
+
+CATALOG = [
+    "Football", "Laptop", "Notebook", "Blue Pen", "Red Pen", "Wireless Mouse",
+    "PS5", "iPhone 15", "iPhone 15 Pro",
+]
+CORPUS = [
+    json.loads(line) for line in
+    (Path(__file__).parent / "data" / "agent_parser_corpus.jsonl").read_text().splitlines()
+    if line.strip()
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    index = ProductNameIndex()
+    index.load_names(CATALOG)
+    return index
+
+
+def rules_result(query, index):
+    """(product, quantity) the rules commit to, or (None, None) for the LLM."""
+    name, quantity, confidence = parse_query(query, index)
+    if name is None or confidence < MIN_CONFIDENCE:
+        return None, None
+    return name, quantity
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["query"] for c in CORPUS])
+def test_corpus(case, index):
+    assert rules_result(case["query"], index) == (case["product"], case["quantity"])
+
+
+def test_corpus_accuracy_and_coverage(index):
+    answered = [c for c in CORPUS if rules_result(c["query"], index)[0] is not None]
+    correct = [c for c in answered
+               if rules_result(c["query"], index) == (c["product"], c["quantity"])]
+    # a wrong answer places a wrong order; falling back only costs latency
+    assert len(correct) == len(answered)
+    assert len(answered) >= len([c for c in CORPUS if c["product"]])
+
+
+def test_agent_orders_one_ps5(client, db, make_user, make_product):
+    from app import main, models
+
+    product = make_product(name="PS5", stock=10)
+    _, headers = make_user()
+    main.name_index._loaded_at = None  # pick up this test's catalog
+    response = client.post("/agent/order", params={"query": "buy ps5"}, headers=headers)
+    assert response.status_code == 200
+    db.expire_all()
+    ordered = db.query(models.OrderItem).filter(
+        models.OrderItem.product_id == product.id).all()
+    assert [item.quantity for item in ordered] == [1]
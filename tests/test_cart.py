@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+
+def _queries(response) -> int:
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+def _cart_queries(client, headers):
+    client.get("/cart/", headers=headers)  # warm the principal and product caches
+    response = client.get("/cart/", headers=headers)
+    assert response.status_code == 200
+    return _queries(response), len(response.json()["cart_items"])
+
+
+@pytest.mark.parametrize("items", [1, 5, 10])
+def test_get_cart_query_budget_does_not_grow_with_items(client, make_user, make_product, items):
+    _, headers = make_user()
+    for n in range(items):
+        product = make_product(name=f"Item {n}")
+        client.post("/cart/items", headers=headers,
+                    json={"product_id": product.id, "quantity": 1})
+    queries, count = _cart_queries(client, headers)
+    assert count == items
+    # cart + items; products and categories come from the product cache
+    assert queries <= 3
+
+
+@pytest.mark.parametrize("items", [1, 5, 20])
+def test_add_cart_item_query_budget_does_not_grow_with_items(client, make_user, make_product, items):
+    _, headers = make_user()
+    client.get("/cart/", headers=headers)  # warm the principal cache, create the cart
+    products = [make_product(name=f"Item {n}") for n in range(items)]
+    for product in products:
+        response = client.post("/cart/items", headers=headers,
+                               json={"product_id": product.id, "quantity": 1})
+        assert response.status_code == 200
+    # cart, existing line, insert and the line echoed back; never the other lines
+    assert _queries(response) <= 7
+
+
+def test_get_cart_cold_cache_query_budget(client, make_user, make_product):
+    from app import crud
+
+    _, headers = make_user()
+    for n in range(10):
+        product = make_product(name=f"Item {n}")
+        client.post("/cart/items", headers=headers,
+                    json={"product_id": product.id, "quantity": 1})
+    client.get("/users/me", headers=headers)
+    crud.product_cache.clear()
+    response = client.get("/cart/", headers=headers)
+    assert len(response.json()["cart_items"]) == 10
+    # cart, items, products, categories
+    assert _queries(response) <= 5
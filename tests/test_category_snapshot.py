@@ -0,0 +1,115 @@
+from app import models
+from app.category_snapshot import CategorySnapshot
+
+
+def test_refresh_aggregates_without_holding_the_lock(db, make_product, monkeypatch):
+    product = make_product(price=25)
+    snapshot = CategorySnapshot()
+    snapshot.items(db)
+
+    aggregate = snapshot._aggregate
+    held = []
+
+    def checked(*args, **kwargs):
+        held.append(snapshot._lock.locked())
+        return aggregate(*args, **kwargs)
+
+    monkeypatch.setattr(snapshot, "_aggregate", checked)
+    product.price = 30
+    db.commit()
+    snapshot.refresh(db, [product.category_id])
+
+    assert held == [False]
+    _, entries = snapshot.items(db)
+    assert entries[0]["max_price"] == 30
+    assert held == [False]
+
+
+def _summary(client, category_id):
+    response = client.get("/categories/categories/")
+    assert response.status_code == 200
+    return next(c for c in response.json() if c["category_id"] == category_id)
+
+
+def _range(client, category_id):
+    entry = _summary(client, category_id)
+    return entry["product_count"], entry["min_price"], entry["max_price"]
+
+
+def _update(client, headers, product, **changes):
+    body = {"description": "d", "price": float(product.price),
+            "category_id": product.category_id, **changes}
+    response = client.put(f"/products/{product.id}", headers=headers, json=body)
+    assert response.status_code == 200, response.text
+
+
+def test_counts_and_prices_follow_product_writes(client, db, make_user, make_product):
+    _, admin = make_user(role="admin")
+    cheap = make_product(price=10)
+    category_id = cheap.category_id
+    assert _range(client, category_id) == (1, 10, 10)
+
+    response = client.post("/products/", headers=admin, json={
+        "name": "Pricey", "price": 50, "category_id": category_id})
+    assert response.status_code == 200
+    pricey = db.get(models.Products, response.json()["id"])
+    assert _range(client, category_id) == (2, 10, 50)
+
+    _update(client, admin, pricey, price=40)
+    assert _range(client, category_id) == (2, 10, 40)
+
+    _update(client, admin, cheap, is_active=False)
+    assert _range(client, category_id) == (1, 40, 40)
+
+    assert client.delete(f"/products/{pricey.id}", headers=admin).status_code in (200, 204)
+    assert _range(client, category_id) == (0, None, None)
+
+
+def test_moving_a_product_updates_both_categories(client, make_user, make_product):
+    _, admin = make_user(role="admin")
+    product = make_product(price=10)
+    other = make_product(price=30)
+    _update(client, admin, product, category_id=other.category_id)
+    assert _range(client, product.category_id) == (0, None, None)
+    assert _range(client, other.category_id) == (2, 10, 30)
+
+
+def test_bulk_import_is_reflected(client, make_user, make_product):
+    _, admin = make_user(role="admin")
+    category_id = make_product(price=10).category_id
+    csv_body = (
+        "name,price,category_id\n"
+        f"Imported A,5,{category_id}\n"
+        f"Imported B,99,{category_id}\n")
+    response = client.post(
+        "/products/import", headers=admin,
+        files={"file": ("products.csv", csv_body, "text/csv")})
+    assert response.status_code == 200, response.text
+    assert _range(client, category_id) == (3, 5, 99)
+
+
+def test_another_workers_snapshot_sees_writes(client, db, make_user, make_product):
+    _, admin = make_user(role="admin")
+    product = make_product(price=10)
+    # a second process has its own snapshot; it only shares the version
+    other = CategorySnapshot()
+    other.items(db)
+
+    _update(client, admin, product, price=20)
+    db.expire_all()
+    _, entries = other.items(db)
+    entry = next(e for e in entries if e["category_id"] == product.category_id)
+    assert entry["max_price"] == 20
+
+
+def test_category_list_answers_304_until_a_write(client, make_user, make_product):
+    _, admin = make_user(role="admin")
+    product = make_product(price=10)
+    etag = client.get("/categories/categories/").headers["etag"]
+    assert client.get(
+        "/categories/categories/", headers={"If-None-Match": etag}).status_code == 304
+
+    _update(client, admin, product, price=15)
+    response = client.get("/categories/categories/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,35 @@
+import pytest
+
+from app.agent.extraction_cache import ExtractionCache
+
+NIKE = {"product_name": "Nike Running Shoes", "quantity": 2}
+
+
+def test_fuzzy_tier_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("AGENT_EXTRACTION_CACHE_FUZZY", raising=False)
+    cache = ExtractionCache.from_env()
+    cache.put("please buy 2 nike running shoes", NIKE)
+    assert not cache.fuzzy
+    assert cache.get("Please buy two Nike running shoes!") == NIKE
+    assert cache.get("please buy 2 nike running shoes now") is None
+
+
+def test_fuzzy_hit_for_a_rephrasing():
+    cache = ExtractionCache(fuzzy=True, threshold=0.6)
+    cache.put("please buy 2 nike running shoes", NIKE)
+    assert cache.get("please buy 2 nike running shoes now") == NIKE
+    assert cache.stats()["fuzzy_hits"] == 1
+
+
+@pytest.mark.parametrize("query", [
+    "please buy 2 puma running shoes",
+    "please buy 2 nike walking shoes",
+    "please buy 2 nike running socks",
+    "please buy 3 nike running shoes",
+    "please buy 2 running shoes",
+])
+def test_near_miss_queries_do_not_hit(query):
+    cache = ExtractionCache(fuzzy=True, threshold=0.5)
+    cache.put("please buy 2 nike running shoes", NIKE)
+    assert cache.get(query) is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,54 @@
+from app.database import engine
+from app.http_cache import TableVersions
+
+
+def _other_worker():
+    # a second process would build its own TableVersions on the same database
+    other = TableVersions()
+    other.use_database(engine)
+    return other
+
+
+def test_versions_are_shared_between_workers():
+    mine, other = _other_worker(), _other_worker()
+    before = mine.get("products")
+    assert other.bump("products") != before
+    assert mine.get("products") == other.get("products")
+
+
+def test_list_etag_changes_after_another_workers_write(client, make_product):
+    make_product()
+    etag = client.get("/products/products/").headers["etag"]
+    _other_worker().bump("products")
+    response = client.get("/products/products/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_product_etag_changes_on_every_update(client, make_user, make_product):
+    product = make_product(price=10)
+    _, headers = make_user(role="admin")
+    etags = [client.get(f"/products/products/{product.id}").headers["etag"]]
+    for price in (11, 12):
+        # both updates land within the same second
+        response = client.put(f"/products/{product.id}", headers=headers, json={
+            "description": "d", "price": price, "category_id": product.category_id})
+        assert response.status_code == 200
+        etags.append(client.get(f"/products/products/{product.id}").headers["etag"])
+    assert len(set(etags)) == 3
+
+    stale = client.get(
+        f"/products/products/{product.id}", headers={"If-None-Match": etags[1]})
+    assert stale.status_code == 200
+    assert stale.json()["price"] == 12
+
+
+def test_product_etag_changes_when_stock_is_ordered(client, make_user, make_product):
+    product = make_product(stock=5)
+    user, headers = make_user()
+    etag = client.get(f"/products/products/{product.id}").headers["etag"]
+    response = client.post("/orders/buy-now", headers=headers, json={
+        "product_id": product.id, "quantity": 2,
+        "shipping_address_id": user.addresses[0].address_id})
+    assert response.status_code == 200
+    fresh = client.get(f"/products/products/{product.id}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
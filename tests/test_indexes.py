@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+
+# (table, foreign key column, index the lookup should use)
+FOREIGN_KEY_LOOKUPS = [
+    ("addresses", "user_id", "ix_addresses_user_id"),
+    ("orders", "user_id", "ix_orders_user_id"),
+    ("order_items", "order_id", "ix_order_items_order_id"),
+    ("order_items", "product_id", "ix_order_items_product_id"),
+    ("cart", "user_id", "ix_cart_user_id"),
+    ("cart_items", "cart_id", "uq_cart_items_cart_id_product_id"),
+    ("cart_items", "product_id", "ix_cart_items_product_id"),
+    ("payments", "order_id", "ix_payments_order_id"),
+    ("reviews", "user_id", "ix_reviews_user_id"),
+    ("reviews", "product_id", "ix_reviews_product_id_review_id"),
+    ("shipping", "order_id", "ix_shipping_order_id"),
+]
+
+
+def _plan(sql):
+    with engine.connect() as conn:
+        return " ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+@pytest.mark.parametrize("table,column,index", FOREIGN_KEY_LOOKUPS)
+def test_foreign_key_lookup_uses_index(table, column, index):
+    plan = _plan(f"SELECT * FROM {table} WHERE {column} = 1")
+    assert f"INDEX {index}" in plan, plan
+
+
+def test_cart_line_lookup_uses_unique_index():
+    plan = _plan("SELECT * FROM cart_items WHERE cart_id = 1 AND product_id = 2")
+    assert "INDEX uq_cart_items_cart_id_product_id" in plan, plan
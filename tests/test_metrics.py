@@ -0,0 +1,69 @@
+import re
+
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.main import app
+from app.metrics import RequestStats, RouteMetrics, route_metrics
+
+
+def _families(text):
+    """{family: sample lines}, failing if a family's samples are split up."""
+    families, current = {}, None
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            current = line.split()[2]
+            assert current not in families, f"{current} declared twice"
+            families[current] = []
+            continue
+        name = line.split("{")[0].split(" ")[0]
+        assert current and name.startswith(current), f"{line!r} outside {current}"
+        families[current].append(line)
+    return families
+
+
+def test_route_metrics_keep_each_family_together():
+    metrics = RouteMetrics()
+    for route, duration in (("/a", 0.01), ("/b", 0.02), ("/a", 0.03)):
+        metrics.observe("GET", route, 200, duration, RequestStats())
+
+    summary = _families(metrics.prometheus())["http_request_duration_recent_seconds"]
+    assert 'http_request_duration_recent_seconds_count{method="GET",route="/a"} 2' in summary
+    assert 'http_request_duration_recent_seconds_sum{method="GET",route="/b"} 0.02' in summary
+
+
+def test_server_timing_reports_queries(client, make_product):
+    product = make_product()
+    client.get(f"/products/products/{product.id}")  # warm the version rows
+    response = client.get(f"/products/products/{product.id}")
+    timing = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries", pool;dur=[\d.]+, app;dur=[\d.]+',
+        response.headers["server-timing"])
+    assert timing, response.headers["server-timing"]
+    # the product comes from the product cache; only the two ETag versions are read
+    assert timing.group(1) == "2"
+
+
+def test_unhandled_exception_is_recorded_as_500(make_product, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(crud, "list_products", broken)
+    key = ("GET", "/products/products/")
+    before = dict(route_metrics._routes.get(key, {"count": 0, "errors": 0}))
+    client = TestClient(app, raise_server_exceptions=False)
+    assert client.get("/products/products/").status_code == 500
+
+    after = route_metrics._routes[key]
+    assert after["count"] == before["count"] + 1
+    assert after["errors"] == before["errors"] + 1
+
+
+def test_admin_metrics_exposition_is_grouped(client, make_user):
+    _, headers = make_user(role="admin")
+    client.get("/products/products/")
+    response = client.get("/admin/metrics", headers=headers)
+    assert response.status_code == 200
+    families = _families(response.text)
+    assert families["db_pool_checkouts_total"]
+    assert families["http_request_duration_seconds"]
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+
+import pytest
+
+from app import crud, models
+from app.database import SessionLocal
+from tests.test_cart import _queries
+
+STOCK = 40
+BUYERS = 200
+
+
+def _with_retries(fn):
+    """fn(), retrying while SQLite reports the database locked."""
+    for attempt in range(50):
+        try:
+            return fn()
+        except OperationalError as exc:
+            if "database is locked" not in str(exc):
+                raise
+            time.sleep(0.01 * (attempt + 1))
+    raise AssertionError("database stayed locked")
+
+
+def _in_parallel(calls):
+    """Runs every (fn, args) at once, each with its own session."""
+    barrier = threading.Barrier(len(calls))
+    outcomes = []
+    lock = threading.Lock()
+
+    def call(fn, args):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            _with_retries(lambda: fn(session, *args))
+            outcome = "ordered"
+        except ValueError:
+            outcome = "rejected"
+        except Exception as exc:
+            outcome = repr(exc)
+        finally:
+            session.close()
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=call, args=c) for c in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+@pytest.mark.parametrize("items", [1, 5, 20])
+def test_checkout_query_budget_does_not_grow_with_items(client, make_user, make_product, items):
+    user, headers = make_user()
+    for n in range(items):
+        product = make_product(name=f"Item {n}")
+        client.post("/cart/items", headers=headers,
+                    json={"product_id": product.id, "quantity": 1})
+    cart_id = client.get("/cart/", headers=headers).json()["cart_id"]
+    response = client.post(
+        f"/orders/from-cart/{cart_id}", headers=headers,
+        json={"shipping_address_id": user.addresses[0].address_id})
+    assert response.status_code == 200
+    # the lines are read, deleted, inserted and their stock taken in one
+    # statement each, however many there are
+    assert _queries(response) <= 13
+
+
+@pytest.mark.parametrize("orders", [1, 5, 20])
+def test_order_list_query_budget_does_not_grow_with_orders(client, db, make_user, orders):
+    user, headers = make_user()
+    db.add_all(models.Orders(user_id=user.id, total_amount=10, status="paid")
+               for _ in range(orders))
+    db.commit()
+    client.get("/users/me", headers=headers)  # warm the principal cache
+    response = client.get("/orders/", headers=headers)
+    assert len(response.json()) == orders
+    assert _queries(response) <= 2
+
+
+def _ordered_quantity(db, product_id):
+    return db.query(func.coalesce(func.sum(models.OrderItem.quantity), 0)).filter(
+        models.OrderItem.product_id == product_id).scalar()
+
+
+def _checkout(session, user_id):
+    return crud.create_order_from_cart(session, session.get(models.Users, user_id))
+
+
+def _buy_now(session, user_id, product_id):
+    return crud.create_order_buy_now(
+        session, session.get(models.Users, user_id), product_id, 1)
+
+
+def test_concurrent_orders_never_oversell(db, make_user, make_product):
+    product = make_product(stock=STOCK)
+    users = [make_user()[0] for _ in range(BUYERS)]
+    for user in users[::2]:
+        crud.add_item_to_cart(db, user, product.id, 1)
+    calls = [
+        (_checkout, (user.id,)) if i % 2 == 0 else (_buy_now, (user.id, product.id))
+        for i, user in enumerate(users)]
+
+    outcomes = _in_parallel(calls)
+
+    assert sorted(set(outcomes)) == ["ordered", "rejected"]
+    db.expire_all()
+    assert db.get(models.Products, product.id).stock_qty == 0
+    assert _ordered_quantity(db, product.id) == outcomes.count("ordered") == STOCK
+
+
+def test_double_submitted_cart_orders_once(db, make_user, make_product):
+    product = make_product(stock=STOCK)
+    user, _ = make_user()
+    crud.add_item_to_cart(db, user, product.id, 3)
+
+    outcomes = _in_parallel([(_checkout, (user.id,))] * 8)
+
+    assert outcomes.count("ordered") == 1
+    assert outcomes.count("rejected") == 7
+    db.expire_all()
+    assert db.query(models.Orders).filter(models.Orders.user_id == user.id).count() == 1
+    assert _ordered_quantity(db, product.id) == 3
+    assert db.get(models.Products, product.id).stock_qty == STOCK - 3
@@ -0,0 +1,90 @@
+import pytest
+
+
+def test_product_detail_served_from_cache_keeps_category(client, make_product):
+    product = make_product()
+    first = client.get(f"/products/products/{product.id}")
+    second = client.get(f"/products/products/{product.id}")
+    assert first.status_code == second.status_code == 200
+    assert second.json()["category"] == first.json()["category"]
+    assert second.json()["category"]["category_id"] == product.category_id
+
+
+def test_cached_product_does_not_lazy_load_category(db, make_product):
+    from app import crud
+    from app.metrics import RequestStats, _current
+
+    product = make_product()
+    crud.get_product(db, product.id)  # fills the cache
+    db.expunge_all()
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        cached = crud.get_product(db, product.id)
+        assert cached.category.category_id == product.category_id
+    finally:
+        _current.reset(token)
+    assert stats.queries == 0
+
+
+SORT_KEYS = {
+    "newest": lambda p: (p["created_at"], p["id"]),
+    "price_asc": lambda p: (float(p["price"]), p["id"]),
+    "price_desc": lambda p: (float(p["price"]), p["id"]),
+    "rating": lambda p: (p["rating_avg"], p["id"]),
+    "most_reviewed": lambda p: (p["review_count"], p["id"]),
+}
+
+
+def _all_pages(client, sort, limit=2):
+    ids, cursor = [], None
+    for _ in range(20):
+        params = {"sort": sort, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/products/products/", params=params).json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+    raise AssertionError(f"{sort}: pagination did not end, got {ids}")
+
+
+@pytest.mark.parametrize("sort", sorted(SORT_KEYS))
+def test_every_sort_pages_through_ties(client, make_product, sort):
+    # created_at ties (same second), and repeated prices, ratings and counts
+    for price, rating_avg, review_count in (
+            (5, 4.5, 2), (5, 4.5, 2), (5, 3, 7), (10, 3, 7),
+            (10, 0, 0), (1, 0, 0), (1, 4.5, 2)):
+        make_product(price=price, category=False,
+                     rating_avg=rating_avg, review_count=review_count)
+
+    everything = client.get(
+        "/products/products/", params={"sort": sort, "limit": 100}).json()["items"]
+    expected = [item["id"] for item in sorted(
+        everything, key=SORT_KEYS[sort], reverse=sort != "price_asc")]
+    assert [item["id"] for item in everything] == expected
+    assert _all_pages(client, sort) == expected
+
+
+def test_newest_pages_across_rows_with_and_without_microseconds(client, make_product):
+    from datetime import datetime, timezone
+
+    make_product(category=False)  # server default: whole seconds on SQLite
+    make_product(category=False, created_at=datetime(2020, 1, 1, 12, 0, 0, 500, tzinfo=timezone.utc))
+    make_product(category=False, created_at=datetime(2020, 1, 1, 12, 0, 0, tzinfo=timezone.utc))
+    make_product(category=False, created_at=datetime(2020, 1, 1, 12, 0, 0, tzinfo=timezone.utc))
+    assert len(set(_all_pages(client, "newest", limit=1))) == 4
+
+
+def test_cursor_of_a_deleted_product_still_pages(client, db, make_product):
+    from app import models
+
+    for price in (1, 2, 3, 4):
+        make_product(price=price, category=False)
+    page = client.get("/products/products/", params={"sort": "price_asc", "limit": 2}).json()
+    db.query(models.Products).filter(models.Products.id == page["items"][-1]["id"]).delete()
+    db.commit()
+    rest = client.get("/products/products/", params={
+        "sort": "price_asc", "limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [float(item["price"]) for item in rest["items"]] == [3, 4]
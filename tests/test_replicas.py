@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from sqlalchemy import insert, text
+
+from app import database, http_cache, models
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, monkeypatch):
+    # a replica that never received any rows: anything read from it is stale
+    replica = database.ReplicaSet([f"sqlite:///{tmp_path}/replica.db"], health_interval=3600)
+    database.Base.metadata.create_all(bind=replica.engines[0])
+    monkeypatch.setattr(database, "replicas", replica)
+    return replica
+
+
+@pytest.fixture
+def two_replicas(tmp_path, monkeypatch):
+    # each replica holds one product of its own, so a response says which served it
+    replica = database.ReplicaSet(
+        [f"sqlite:///{tmp_path}/a.db", f"sqlite:///{tmp_path}/b.db"], health_interval=3600)
+    for name, eng in zip("AB", replica.engines):
+        database.Base.metadata.create_all(bind=eng)
+        with eng.begin() as conn:
+            conn.execute(insert(models.Products).values(
+                name=name, price=10, stock_qty=1, is_active=True))
+    monkeypatch.setattr(database, "replicas", replica)
+    monkeypatch.setattr(database, "REPLICA_MAX_LAG_SECONDS", 0)
+    return replica
+
+
+def _served_by(client):
+    return client.get("/products/products/").json()["items"][0]["name"]
+
+
+def test_own_write_then_order_list_reads_primary(client, make_user, make_product, lagging_replica):
+    user, headers = make_user()
+    product = make_product()
+    client.get("/users/me", headers=headers)  # principal cached before the write
+    ordered = client.post("/orders/buy-now", headers=headers, json={
+        "product_id": product.id, "quantity": 1,
+        "shipping_address_id": user.addresses[0].address_id})
+    assert ordered.status_code == 200
+    assert database.recent_writers.get(user.id)
+
+    assert [o["id"] for o in client.get("/orders/", headers=headers).json()] == [ordered.json()["id"]]
+
+    # once the user is no longer a recent writer the (empty) replica serves it
+    database.recent_writers.clear()
+    assert client.get("/orders/", headers=headers).json() == []
+
+
+def test_reads_alternate_between_replicas(client, two_replicas):
+    served = [_served_by(client) for _ in range(4)]
+    assert served in (["A", "B", "A", "B"], ["B", "A", "B", "A"])
+
+
+def test_down_replica_is_skipped_and_readmitted(tmp_path):
+    down = tmp_path / "down"
+    replica = database.ReplicaSet(
+        [f"sqlite:///{down}/replica.db", f"sqlite:///{tmp_path}/up.db"], health_interval=0.05)
+    # the first replica's directory is missing, so connecting to it fails
+    with pytest.raises(Exception):
+        with replica.engines[0].connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert [replica.pick() for _ in range(4)] == [1, 1, 1, 1]
+
+    down.mkdir()
+    deadline = time.monotonic() + 5
+    while 0 in replica._down and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert sorted({replica.pick() for _ in range(4)}) == [0, 1]
+
+
+def test_etagged_list_reads_primary_right_after_a_write(client, make_product, lagging_replica):
+    make_product()
+    http_cache.versions.bump("products")
+    response = client.get("/products/products/")
+    assert len(response.json()["items"]) == 1
+
+    # the ETag names the new version, so the body must already include the write
+    etag = response.headers["etag"]
+    assert client.get("/products/products/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_etagged_list_uses_replica_once_lag_window_passed(client, make_product, lagging_replica, monkeypatch):
+    make_product()
+    http_cache.versions.bump("products")
+    monkeypatch.setattr(database, "REPLICA_MAX_LAG_SECONDS", 0)
+    assert client.get("/products/products/").json()["items"] == []
+
+
+def test_category_reads_primary_right_after_a_write(client, make_product, lagging_replica):
+    product = make_product()
+    http_cache.versions.bump("categories")
+    response = client.get(f"/categories/{product.category_id}")
+    assert response.status_code == 200
@@ -0,0 +1,64 @@
+import pytest
+
+from app import fast_json, models
+from tests.test_cart import _queries
+
+
+def _review(client, make_user, product_id, rating):
+    _, headers = make_user()
+    response = client.post("/reviews/", headers=headers, json={
+        "product_id": product_id, "rating": rating, "comment": "ok"})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("reviews", [2, 5, 20])
+def test_review_query_budgets_do_not_grow_with_reviews(client, make_user, make_product, reviews):
+    product = make_product()
+    _, headers = make_user()
+    client.get("/users/me", headers=headers)  # warm the principal cache
+    for _ in range(reviews):
+        created = client.post("/reviews/", headers=headers, json={
+            "product_id": product.id, "rating": 4, "comment": "ok"})
+        assert created.status_code == 200
+    # the product's rating summary, the insert and two version bumps; the
+    # first review also loads the product and creates the version rows
+    assert _queries(created) <= 7
+
+    listed = client.get(f"/reviews/product/{product.id}")
+    assert len(listed.json()) == reviews
+    assert _queries(listed) <= 2
+
+
+def test_rating_summary_is_maintained(client, make_user, make_product):
+    product = make_product()
+    _review(client, make_user, product.id, 4)
+    _review(client, make_user, product.id, 5)
+    body = client.get(f"/products/products/{product.id}").json()
+    assert body["review_count"] == 2
+    assert body["rating_avg"] == 4.5
+    assert body["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}
+
+
+def test_fast_json_product_list_with_histogram(client, make_user, make_product, monkeypatch):
+    product = make_product()
+    _review(client, make_user, product.id, 3)
+    monkeypatch.setattr(fast_json, "FAST_JSON", True)
+    response = client.get("/products/products/")
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item["rating_histogram"]["3"] == 1
+    assert item["rating_avg"] == 3
+
+
+def test_seed_backfill_keeps_fractional_average(db, make_user, make_product):
+    from benchmarks.seed import _refresh_rating_summaries
+
+    product = make_product()
+    for rating in (4, 5):
+        user, _ = make_user()
+        db.add(models.Reviews(user_id=user.id, product_id=product.id, rating=rating))
+    db.commit()
+    _refresh_rating_summaries(db)
+    db.refresh(product)
+    assert float(product.rating_avg) == 4.5
+    assert product.review_count == 2